@@ -1 +1,21 @@
-DATABASE_FILE = 'fitness_tracker.db'
\ No newline at end of file
+DATABASE_FILE = 'fitness_tracker.db'
+
+# Connection pool
+POOL_SIZE = 8
+POOL_TIMEOUT = 30.0
+STATEMENT_CACHE_SIZE = 256
+BUSY_TIMEOUT_MS = 5000
+
+# Worker threads for running independent read queries concurrently
+READ_FANOUT_WORKERS = 4
+
+# Read cache: how often to poll PRAGMA data_version for commits made by
+# other connections or processes (seconds)
+CACHE_POLL_INTERVAL = 0.25
+
+# Query tracing (see db.tracing): off unless enabled here or on the admin
+# page. Statements slower than SLOW_QUERY_MS are kept in a slow-query log of
+# at most SLOW_QUERY_LOG_SIZE entries.
+QUERY_TRACING = False
+SLOW_QUERY_MS = 50
+SLOW_QUERY_LOG_SIZE = 100
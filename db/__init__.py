@@ -1,10 +1,10 @@
-from .connection import get_db_connection
-from .schema import create_tables
+from .connection import get_db_connection, get_pool_stats, close_all_pools
+from .migrations import SCHEMA_VERSION, get_schema_version, migrate
 
 def init_db():
-    """Initialize the database with content i fnot exist"""
+    """Bring the database schema up to date, cheap when it already is"""
     conn = get_db_connection()
-    cursor = conn.cursor()
-    create_tables(cursor)
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""Model-layer benchmarks on synthetic databases.
+
+Every model call checked by db.query_plans (each public function in
+models/ plus the two views), along with the CSV export and import, is
+timed on a copy of a synthetic database at each requested scale. Reads
+are timed without the read cache. Results are written as JSON so runs
+from different commits can be compared with --compare.
+
+At 10m, the refresh_training_load rounds are dominated by rebuilding
+about 500M TrainingLoad rows, which takes about an hour per full refresh
+(see db.synthetic). Use --rounds 1 at that scale.
+
+Run with: python -m db.benchmark [--scales 1k 100k] [--rounds N]
+                                 [--output FILE] [--compare OLD_FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from config import db_config
+from .cache import clear_cache
+from .coherence import close_watchers
+from .connection import close_all_pools
+from .query_plans import model_calls
+from .synthetic import generate
+
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "fitness-benchmark")
+DEFAULT_ROUNDS = 5
+
+# A median this many times slower than the baseline is reported as a
+# regression, unless it grew by less than the noise floor (seconds)
+REGRESSION_RATIO = 1.25
+NOISE_FLOOR = 0.001
+
+
+def _calls(workdir):
+    """model_calls() plus the export and import round trip through a CSV"""
+    from models import export, health_import
+    csv_path = os.path.join(workdir, "Health.csv")
+    calls = model_calls()
+    calls += [
+        ("export_table", export.export_table, ("Health", csv_path)),
+        ("import_health_csv", health_import.import_health_csv, (csv_path,)),
+    ]
+    # Some functions are called with several argument sets
+    seen = {}
+    named = []
+    for name, func, args in calls:
+        seen[name] = seen.get(name, 0) + 1
+        named.append((name if seen[name] == 1 else f"{name}[{seen[name]}]",
+                      func, args))
+    return named
+
+
+def _stats(times):
+    return {
+        "min": min(times),
+        "max": max(times),
+        "mean": statistics.fmean(times),
+        "median": statistics.median(times),
+        "stddev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "rounds": len(times),
+    }
+
+
+def dataset(scale, data_dir=DEFAULT_DATA_DIR, seed=0):
+    """Path of the synthetic database for a scale, generating it if needed"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic-{scale}-seed{seed}.db")
+    if not os.path.exists(path):
+        generate(path, scale, seed)
+    return path
+
+
+def benchmark_scale(scale, rounds=DEFAULT_ROUNDS, data_dir=DEFAULT_DATA_DIR,
+                    seed=0):
+    """Time every model call on a copy of the scale's synthetic database.
+
+    Calls run in model_calls() order, reads before writes and deletes, so
+    later rounds of a write see the rows earlier rounds left behind.
+    """
+    source = dataset(scale, data_dir, seed)
+    workdir = tempfile.mkdtemp(prefix=f"bench-{scale}-")
+    path = os.path.join(workdir, "fitness_tracker.db")
+    shutil.copyfile(source, path)
+    original = db_config.DATABASE_FILE
+    db_config.DATABASE_FILE = path
+    results = []
+    try:
+        clear_cache()
+        for name, func, args in _calls(workdir):
+            times = []
+            for _ in range(rounds):
+                clear_cache()
+                started = time.perf_counter()
+                func(*args)
+                times.append(time.perf_counter() - started)
+            results.append({"name": name, "scale": scale, "stats": _stats(times)})
+    finally:
+        db_config.DATABASE_FILE = original
+        close_all_pools()
+        close_watchers()
+        clear_cache()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales, rounds=DEFAULT_ROUNDS, data_dir=DEFAULT_DATA_DIR, seed=0):
+    """Benchmark each scale and return the report as a dict"""
+    benchmarks = []
+    for scale in scales:
+        benchmarks += benchmark_scale(scale, rounds, data_dir, seed)
+    return {
+        "commit": _commit(),
+        "datetime": datetime.now(timezone.utc).isoformat(),
+        "machine_info": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "seed": seed,
+        "benchmarks": benchmarks,
+    }
+
+
+def compare(baseline, report):
+    """(name, scale, baseline median, median, ratio) for benchmarks in both.
+
+    Only runs with the same number of rounds are compared: the first round
+    of a write does the work and later ones mostly find nothing to do, so
+    the median depends on the round count.
+    """
+    old = {(b["name"], b["scale"], b["stats"]["rounds"]): b["stats"]["median"]
+           for b in baseline["benchmarks"]}
+    rows = []
+    for b in report["benchmarks"]:
+        key = (b["name"], b["scale"], b["stats"]["rounds"])
+        if old.get(key):
+            median = b["stats"]["median"]
+            rows.append((*key[:2], old[key], median, median / old[key]))
+    return rows
+
+
+if __name__ == "__main__":
+    from .synthetic import SCALES
+    parser = argparse.ArgumentParser(description="Benchmark the model layer")
+    parser.add_argument("--scales", nargs="+", choices=SCALES, default=["1k"])
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    report = run(args.scales, args.rounds, args.data_dir, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    for b in report["benchmarks"]:
+        print(f"{b['scale']:>5} {b['name']:<40} {b['stats']['median'] * 1000:10.2f} ms")
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(baseline, report)
+        if not rows:
+            print("Nothing to compare: no benchmark with the same name, scale and rounds")
+        regressions = 0
+        for name, scale, before, after, ratio in rows:
+            flag = ""
+            if ratio > REGRESSION_RATIO and after - before > NOISE_FLOOR:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{scale:>5} {name:<40} {before * 1000:9.2f} -> "
+                  f"{after * 1000:9.2f} ms ({ratio:.2f}x){flag}")
+        if regressions:
+            sys.exit(1)
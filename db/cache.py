@@ -0,0 +1,125 @@
+import copy
+import functools
+import threading
+from collections import OrderedDict
+from config import db_config
+from .coherence import get_watcher
+
+# Read results are cached per database file and keyed on its generation
+# number. Every model write bumps the generation, which drops the entries
+# computed from the old data. Commits by other connections or processes
+# are picked up through PRAGMA data_version (see db.coherence).
+MAX_ENTRIES = 512
+
+_generations = {}
+_entries = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0,
+          "external_invalidations": 0}
+
+
+def get_generation(database=None):
+    """Current generation number of a database file"""
+    database = database or db_config.DATABASE_FILE
+    with _lock:
+        return _generations.get(database, 0)
+
+
+def _invalidate(database):
+    with _lock:
+        _generations[database] = _generations.get(database, 0) + 1
+        for key in [key for key in _entries if key[0] == database]:
+            del _entries[key]
+        _stats["invalidations"] += 1
+
+
+def bump_generation(database=None):
+    """Mark a database as changed by us and drop its cached reads"""
+    database = database or db_config.DATABASE_FILE
+    _invalidate(database)
+    # Our own commit must not be reported back as an external one
+    get_watcher(database).sync()
+
+
+def check_external_writes(database=None):
+    """Drop cached reads if another connection committed since the last poll"""
+    database = database or db_config.DATABASE_FILE
+    if get_watcher(database).changed():
+        _invalidate(database)
+        with _lock:
+            _stats["external_invalidations"] += 1
+        return True
+    return False
+
+
+def _cacheable(result):
+    return not (isinstance(result, dict) and result.get("success") is False)
+
+
+def cached_read(func):
+    """Serve a model read function from memory until the database changes.
+
+    Results are deep-copied on the way out so callers can modify the
+    DataFrames they get back without corrupting the cache.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        database = db_config.DATABASE_FILE
+        check_external_writes(database)
+        with _lock:
+            generation = _generations.get(database, 0)
+            key = (database, generation, name, args,
+                   tuple(sorted(kwargs.items())))
+            try:
+                result = _entries[key]
+                _entries.move_to_end(key)
+                _stats["hits"] += 1
+                hit = True
+            except KeyError:
+                _stats["misses"] += 1
+                hit = False
+            except TypeError:
+                # Unhashable arguments can't be cached
+                hit = None
+        if hit:
+            return copy.deepcopy(result)
+
+        result = func(*args, **kwargs)
+        if hit is False and _cacheable(result):
+            with _lock:
+                # Only store it if nothing was written while we were reading
+                if _generations.get(database, 0) == generation:
+                    _entries[key] = result
+                    while len(_entries) > MAX_ENTRIES:
+                        _entries.popitem(last=False)
+            return copy.deepcopy(result)
+        return result
+
+    wrapper.uncached = func
+    return wrapper
+
+
+def invalidates_cache(func):
+    """Bump the database generation after a model write function runs"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            bump_generation()
+
+    return wrapper
+
+
+def clear_cache():
+    """Drop every cached read"""
+    with _lock:
+        _entries.clear()
+
+
+def get_cache_stats():
+    """Hit/miss/invalidation counters and the number of cached entries"""
+    with _lock:
+        return dict(_stats, entries=len(_entries))
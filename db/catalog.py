@@ -0,0 +1,52 @@
+import threading
+from config import db_config
+from .connection import get_db_connection
+
+# Column names per table, cached per database file until the next migration
+_catalogs = {}
+_lock = threading.Lock()
+
+
+def _load():
+    """Read the column names of every table in one pass"""
+    conn = get_db_connection()
+    try:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")]
+        return {
+            table: tuple(col[1] for col in conn.execute(f'PRAGMA table_info("{table}")'))
+            for table in tables
+        }
+    finally:
+        conn.close()
+
+
+def _catalog():
+    database = db_config.DATABASE_FILE
+    catalog = _catalogs.get(database)
+    if catalog is None:
+        catalog = _load()
+        with _lock:
+            _catalogs[database] = catalog
+    return catalog
+
+
+def get_columns(table):
+    """Get the column names of a table, or an empty tuple if it doesn't exist"""
+    return _catalog().get(table, ())
+
+
+def resolve_column(table, name):
+    """Get the actual (case-sensitive) name of a column, or None if missing"""
+    lowered = name.lower()
+    return next((col for col in get_columns(table) if col.lower() == lowered),
+                None)
+
+
+def invalidate(database=None):
+    """Forget cached column names, e.g. after the schema changed"""
+    with _lock:
+        if database is None:
+            _catalogs.clear()
+        else:
+            _catalogs.pop(database, None)
@@ -0,0 +1,73 @@
+import sqlite3
+import threading
+import time
+from config import db_config
+
+
+class DataVersionWatcher:
+    """Detect commits made by other connections to a database file.
+
+    PRAGMA data_version on a connection changes whenever any *other*
+    connection commits, whether in this process or another one. The watcher
+    keeps a dedicated connection that never writes, so a changed value
+    means someone else changed the data.
+    """
+
+    def __init__(self, database, interval=db_config.CACHE_POLL_INTERVAL):
+        self.database = database
+        self.interval = interval
+        self._conn = sqlite3.connect(database, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._version = self._read()
+        self._checked = time.monotonic()
+
+    def _read(self):
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def changed(self):
+        """True if another connection committed since the last check.
+
+        Polls at most once per interval; between polls it reports no change.
+        """
+        now = time.monotonic()
+        if now - self._checked < self.interval:
+            return False
+        with self._lock:
+            self._checked = now
+            version = self._read()
+            if version == self._version:
+                return False
+            self._version = version
+            return True
+
+    def sync(self):
+        """Adopt the current data_version as seen, e.g. after our own write"""
+        with self._lock:
+            self._version = self._read()
+            self._checked = time.monotonic()
+
+    def close(self):
+        self._conn.close()
+
+
+_watchers = {}
+_lock = threading.Lock()
+
+
+def get_watcher(database=None):
+    """Return the data_version watcher for a database file"""
+    database = database or db_config.DATABASE_FILE
+    with _lock:
+        watcher = _watchers.get(database)
+        if watcher is None:
+            watcher = _watchers[database] = DataVersionWatcher(database)
+        return watcher
+
+
+def close_watchers():
+    """Close every watcher connection"""
+    with _lock:
+        watchers = list(_watchers.values())
+        _watchers.clear()
+    for watcher in watchers:
+        watcher.close()
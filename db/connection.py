@@ -1,8 +1,204 @@
 import sqlite3
+import threading
+import time
+import weakref
+from pathlib import Path
 from config import db_config
+from . import tracing
+
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection whose close() hands it back to its pool"""
+
+    _pool = None
+    _traced = False
+    _checked_out = False
+
+    def cursor(self, factory=None):
+        """New cursor; a timing one while query tracing is enabled"""
+        if factory is None:
+            factory = tracing.TracedCursor if tracing.tracing_enabled() else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        # Go through cursor() so shortcut calls are traced as well
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        """Return the connection to the pool instead of closing it.
+
+        Closing a connection that is not checked out is a no-op, so a second
+        close() cannot put it in the idle list twice.
+        """
+        if self._pool is None:
+            super().close()
+        elif self._checked_out:
+            self._pool.checkin(self)
+
+    def _close(self):
+        """Really close the underlying SQLite connection and free its slot"""
+        self._pool = None
+        self._checked_out = False
+        super().close()
+        self._release()
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived connections to one database file"""
+
+    def __init__(self, database, size=db_config.POOL_SIZE,
+                 timeout=db_config.POOL_TIMEOUT, readonly=False):
+        self.database = database
+        self.readonly = readonly
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._open = 0
+        self._cond = threading.Condition()
+        self.stats = {"hits": 0, "misses": 0, "waits": 0, "timeouts": 0}
+
+    def _connect(self):
+        """Open a new connection and apply the per-connection pragmas once"""
+        if self.readonly:
+            target = Path(self.database).absolute().as_uri() + "?mode=ro"
+        else:
+            target = self.database
+        conn = sqlite3.connect(
+            target,
+            uri=self.readonly,
+            factory=PooledConnection,
+            check_same_thread=False,
+            cached_statements=db_config.STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        conn._traced_cursors = []
+        conn.execute(f"PRAGMA busy_timeout = {int(db_config.BUSY_TIMEOUT_MS)}")
+        conn.execute("PRAGMA foreign_keys = ON")
+        if self.readonly:
+            conn.execute("PRAGMA query_only = ON")
+        else:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        conn._pool = self
+        # A checked-out connection that is never closed must not keep its
+        # slot forever, so free the slot when it is garbage collected.
+        # _close() frees it straight away; a finalizer only runs once.
+        conn._release = weakref.finalize(conn, self._release_slot)
+        return conn
+
+    def _release_slot(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def checkout(self):
+        """Take an idle connection, open a new one, or wait for a checkin"""
+        conn = self._checkout()
+        conn._checked_out = True
+        if conn._traced != tracing.tracing_enabled():
+            conn._traced = tracing.tracing_enabled()
+            conn.set_trace_callback(tracing.on_statement if conn._traced else None)
+        return conn
+
+    def _checkout(self):
+        with self._cond:
+            if self._idle:
+                self.stats["hits"] += 1
+                return self._idle.pop()
+            if self._open >= self.size:
+                self.stats["waits"] += 1
+                deadline = time.monotonic() + self.timeout
+                while not self._idle and self._open >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats["timeouts"] += 1
+                        raise TimeoutError(
+                            f"No database connection available after {self.timeout}s")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    self.stats["hits"] += 1
+                    return self._idle.pop()
+            self.stats["misses"] += 1
+            self._open += 1
+        try:
+            return self._connect()
+        except Exception:
+            self._release_slot()
+            raise
+
+    def checkin(self, conn):
+        """Give a connection back, discarding any uncommitted work"""
+        conn._checked_out = False
+        if conn._traced_cursors:
+            tracing.finish_statements(conn)
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn._close()
+            return
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def dispose(self):
+        """Close all idle connections"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn._close()
+
+    def get_stats(self):
+        """Snapshot of the pool counters"""
+        with self._cond:
+            return dict(self.stats, open=self._open, idle=len(self._idle),
+                        size=self.size)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_pool(database=None, readonly=False):
+    """Return the pool for a database file, creating it on first use"""
+    database = database or db_config.DATABASE_FILE
+    with _pools_lock:
+        pool = _pools.get((database, readonly))
+        if pool is None:
+            pool = _pools[(database, readonly)] = ConnectionPool(
+                database, readonly=readonly)
+        return pool
+
+
+def use_read_only_connections():
+    """Make get_db_connection() hand out read-only connections in this thread.
+
+    Meant as a thread pool initializer for workers that only run reads.
+    """
+    _local.readonly = True
+
 
 def get_db_connection():
-    """Create and return a connection to the SQLite database"""
-    conn = sqlite3.connect(db_config.DATABASE_FILE)
-    conn.row_factory = sqlite3.Row
-    return conn
\ No newline at end of file
+    """Check out a pooled connection to the SQLite database; close() returns it"""
+    return get_pool(readonly=getattr(_local, "readonly", False)).checkout()
+
+
+def get_pool_stats():
+    """Get hit/miss/wait counters for every connection pool"""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {database + (" (read-only)" if readonly else ""): pool.get_stats()
+            for (database, readonly), pool in pools}
+
+
+def close_all_pools():
+    """Close every idle pooled connection and forget the pools"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.dispose()
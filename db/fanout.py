@@ -0,0 +1,42 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import db_config
+from .connection import use_read_only_connections
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=db_config.READ_FANOUT_WORKERS,
+                thread_name_prefix="db-read",
+                initializer=use_read_only_connections,
+            )
+        return _executor
+
+
+def run_reads(reads):
+    """Run independent model reads concurrently on read-only connections.
+
+    reads maps a name to a (function, args) pair. Returns a dict with each
+    function's result under the same name; a read that raises is reported
+    as {"success": False, "error": ...} instead of failing the others.
+    Takes roughly as long as the slowest read.
+    """
+    executor = _get_executor()
+    # Each read runs in a copy of the caller's context, so context variables
+    # such as the page profiler's follow it onto the worker
+    futures = {name: executor.submit(contextvars.copy_context().run, func, *args)
+               for name, (func, args) in reads.items()}
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            results[name] = {"success": False, "error": str(e)}
+    return results
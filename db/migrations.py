@@ -0,0 +1,70 @@
+from . import cache, catalog
+from .schema import create_tables, create_indexes, \
+    create_user_progress_summary, create_exercise_stats, create_row_counts, \
+    create_health_rollups, store_workout_epoch_times, store_run_pace_seconds, \
+    create_training_load, create_personal_records, create_goal_progress, \
+    create_user_daily_activity, create_health_date_index
+
+# Ordered schema migrations. Each step takes a cursor and runs inside the
+# migration transaction; PRAGMA user_version records the last step applied.
+MIGRATIONS = [
+    (1, create_tables),
+    (2, create_indexes),
+    (3, create_user_progress_summary),
+    (4, create_exercise_stats),
+    (5, create_row_counts),
+    (6, create_health_rollups),
+    (7, store_workout_epoch_times),
+    (8, store_run_pace_seconds),
+    (9, create_training_load),
+    (10, create_personal_records),
+    (11, create_goal_progress),
+    (12, create_user_daily_activity),
+    (13, create_health_date_index),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """Read the schema version stored in PRAGMA user_version"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending migrations and return the resulting schema version.
+
+    When the schema is already current this is a single pragma read and no
+    write lock is taken.
+    """
+    version = get_schema_version(conn)
+    if version >= SCHEMA_VERSION:
+        return version
+
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    # Table rebuilds need foreign keys off, and the pragma is a no-op
+    # inside a transaction, so switch it before taking the lock.
+    conn.execute("PRAGMA foreign_keys = OFF")
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            version = get_schema_version(conn)
+            for step_version, step in MIGRATIONS:
+                if step_version > version:
+                    step(cursor)
+                    cursor.execute(f"PRAGMA user_version = {int(step_version)}")
+                    version = step_version
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+    finally:
+        conn.execute("PRAGMA legacy_alter_table = OFF")
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.isolation_level = isolation_level
+        catalog.invalidate()
+        cache.bump_generation()
+    return version
@@ -0,0 +1,249 @@
+"""EXPLAIN QUERY PLAN regression check for the SQL issued by models/.
+
+Every model function is called against a throwaway database while the
+statements it runs are traced. Each traced SELECT/UPDATE/DELETE is then
+explained, and any full table SCAN fails the check. Functions that list a
+whole table may scan their driving table once; the tables they join must
+still be searched through an index.
+
+Run with: python -m db.query_plans
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import date
+
+from config import db_config
+from .cache import clear_cache
+from .coherence import close_watchers
+from .connection import get_pool, close_all_pools
+from .migrations import migrate
+
+# Functions whose job is to read a whole table
+FULL_LISTINGS = {
+    "get_all_users", "get_user_ids",
+    "get_all_health_records",
+    "get_all_goals",
+    # drains the GoalProgressDirty queue
+    "evaluate_goals", "evaluate_goals_full",
+    "get_all_workouts", "get_workout_ids", "get_workout_statistics",
+    "get_exercises",
+    "get_all_exercises",
+    "UserProgressOverview", "ExerciseEffectivenessAnalysis",
+    "refresh_full", "get_exercise_effectiveness", "get_user_progress_overview",
+    "get_table_counts",
+    # drains the whole ExerciseStatsDirty queue
+    "refresh",
+    # drains the TrainingLoadDirty queue, or queues every user
+    "refresh_training_load", "refresh_training_load_full", "extend_training_load",
+    "get_personal_records", "rebuild_personal_records",
+    # rank every user
+    "get_rankings", "compare_users", "get_leaderboard",
+}
+
+# Keyset-paged and LIMITed searches: their outer query may walk an index
+# in ORDER BY order, since it stops after one page
+BOUNDED_LISTINGS = {
+    "get_workouts_page", "get_health_records_page",
+    "search_workouts", "search_health_records",
+}
+
+EXPLAINED = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def _seed(conn):
+    """Insert a handful of rows so every model call has something to hit"""
+    conn.execute("INSERT INTO Users (fName, lName, weight, DOB, sex) "
+                 "VALUES ('Plan', 'Check', 80, '1990-01-01', 'M')")
+    conn.execute("INSERT INTO Exercise (name, muscleGroup) VALUES ('Squat', 'Legs')")
+    conn.execute("INSERT INTO Exercise (name, muscleGroup) VALUES ('Row', 'Back')")
+    conn.commit()
+
+
+def model_calls():
+    """(name, callable, args) for every public function in models/"""
+    from models import user, health, goals, workout, exercise, analytics, runs, \
+        training_load, records, compare
+
+    def view(name):
+        def read():
+            conn = get_pool().checkout()
+            try:
+                return conn.execute(f"SELECT * FROM {name}").fetchall()
+            finally:
+                conn.close()
+        return read
+
+    new_workout = {"user_id": 1, "start_time": "2024-01-02 10:00:00",
+                   "end_time": "2024-01-02 11:00:00", "max_hr": 150}
+
+    return [
+        ("get_all_users", user.get_all_users, ()),
+        ("get_user_by_id", user.get_user_by_id, (1,)),
+        ("get_user_ids", user.get_user_ids, ()),
+        ("add_user", user.add_user, ("A", "B", 70.0, "2000-01-01", "F")),
+        ("update_user", user.update_user, (2, "A", "C", 71.0, "2000-01-01", "F")),
+        ("get_all_health_records", health.get_all_health_records, ()),
+        ("get_health_by_user", health.get_health_by_user, (1,)),
+        ("get_health_trend", health.get_health_trend,
+         (1, date(2023, 12, 1), date(2024, 1, 31), 90)),
+        ("get_health_trend", health.get_health_trend,
+         (1, date(2023, 1, 1), date(2024, 1, 31), 90)),
+        ("get_health_trend", health.get_health_trend,
+         (1, date(2020, 1, 1), date(2024, 1, 31), 90)),
+        ("get_health_records_page", health.get_health_records_page, (None, 10)),
+        ("get_health_records_page", health.get_health_records_page,
+         ((1, "2023-12-31"), 10)),
+        ("search_health_records", health.search_health_records, ()),
+        ("search_health_records", health.search_health_records,
+         (1, date(2023, 12, 1), date(2024, 1, 31))),
+        ("search_health_records", health.search_health_records,
+         (None, date(2023, 12, 1), None, 20)),
+        ("add_health_record", health.add_health_record,
+         (1, "2024-01-01", 60, 45.0, 50, 7.5)),
+        ("update_health_record", health.update_health_record,
+         (1, "2024-01-01", 61, 45.5, 52, 8.0)),
+        ("evaluate_goals", goals.evaluate_goals, ()),
+        ("evaluate_goals_full", goals.evaluate_goals, (True,)),
+        ("get_all_goals", goals.get_all_goals, ()),
+        ("get_goals_by_user", goals.get_goals_by_user, (1,)),
+        ("add_goal", goals.add_goal, (1, "Run Distance", 10, "km")),
+        ("update_goal", goals.update_goal, (1, "Run Distance", 12, "km", 0)),
+        ("get_all_workouts", workout.get_all_workouts, ()),
+        ("get_workouts_by_user", workout.get_workouts_by_user, (1,)),
+        ("get_workouts_page", workout.get_workouts_page, (None, 10)),
+        ("get_workouts_page", workout.get_workouts_page,
+         ((1704153600, 5), 10)),
+        ("search_workouts", workout.search_workouts, ()),
+        ("search_workouts", workout.search_workouts,
+         (1, date(2024, 1, 1), date(2024, 1, 31), "Run")),
+        ("search_workouts", workout.search_workouts,
+         (None, None, date(2024, 1, 31), "Weightlift", 20)),
+        ("add_workout", workout.add_workout,
+         (1, "2024-01-01 10:00:00", "2024-01-01 11:00:00", 150, "Weightlift")),
+        ("update_workout", workout.update_workout,
+         (1, 1, "2024-01-01 10:00:00", "2024-01-01 11:30:00", 150, "Weightlift")),
+        ("get_workout_ids", workout.get_workout_ids, ()),
+        ("get_workout_statistics", workout.get_workout_statistics, ()),
+        ("add_weightlift_set", workout.add_weightlift_set, (1, 1, 1, 5, 100.0)),
+        ("add_run_interval", workout.add_run_interval, (1, 1, 1.0, "05:00", 0.0)),
+        ("create_run_workout", workout.create_run_workout,
+         (new_workout, [{"interval_nr": 1, "distance": 1.0, "pace": 300, "incline": 0.0}])),
+        ("get_run_analytics", runs.get_run_analytics, (1,)),
+        ("create_weightlift_workout", workout.create_weightlift_workout,
+         (new_workout, [{"exercise_id": 1, "set_nr": 1, "reps": 5, "weight": 60.0}])),
+        ("get_exercises", workout.get_exercises, ()),
+        ("get_all_exercises", exercise.get_all_exercises, ()),
+        ("get_exercise_by_id", exercise.get_exercise_by_id, (1,)),
+        ("add_exercise", exercise.add_exercise, ("Press", "Shoulders")),
+        ("update_exercise", exercise.update_exercise, (3, "Press", "Shoulders")),
+        ("UserProgressOverview", view("UserProgressOverview"), ()),
+        ("ExerciseEffectivenessAnalysis", view("ExerciseEffectivenessAnalysis"), ()),
+        ("refresh", analytics.refresh, ()),
+        ("refresh_full", analytics.refresh, (True,)),
+        ("get_exercise_effectiveness", analytics.get_exercise_effectiveness, ()),
+        ("get_user_progress_overview", analytics.get_user_progress_overview, ()),
+        ("get_table_counts", analytics.get_table_counts, ()),
+        ("refresh_training_load", training_load.refresh_training_load, ()),
+        ("refresh_training_load_full", training_load.refresh_training_load, (True,)),
+        ("extend_training_load", training_load.extend_training_load, ()),
+        ("refresh_training_load", training_load.refresh_training_load, (False, 1)),
+        ("get_training_load", training_load.get_training_load,
+         (1, date(2023, 10, 1), date(2024, 1, 31))),
+        ("get_personal_records", records.get_personal_records, ()),
+        ("get_personal_records", records.get_personal_records, (1,)),
+        ("rebuild_personal_records", records.rebuild_personal_records, ()),
+        ("get_rankings", compare.get_rankings,
+         ("workout_minutes", 28, date(2024, 1, 15))),
+        ("get_rankings", compare.get_rankings, ("weekly_run_km",)),
+        ("get_rankings", compare.get_rankings,
+         ("vo2max_trend", 91, date(2024, 1, 15))),
+        ("compare_users", compare.compare_users, (1, 2, 365, date(2024, 1, 15))),
+        ("get_leaderboard", compare.get_leaderboard, ("lifted_volume", None, 5)),
+        ("delete_exercise", exercise.delete_exercise, (2,)),
+        ("delete_health_record", health.delete_health_record, (1, "2024-01-01")),
+        ("delete_goal", goals.delete_goal, (1, "Run Distance")),
+        ("delete_workout", workout.delete_workout, (1,)),
+        ("delete_user", user.delete_user, (2,)),
+    ]
+
+
+def _scans(conn, sql, bounded=False):
+    """Return the SCAN steps in a statement's query plan.
+
+    bounded exempts index walks of the outer query (not of subqueries).
+    """
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+    details = [row[3] for row in plan]
+    # Scanning a view or subquery result is not a table scan
+    subqueries = {"SCAN " + detail.split(" ", 1)[1] for detail in details
+                  if detail.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+    subqueries.add("SCAN CONSTANT ROW")
+    return [detail for _, parent, _, detail in plan
+            if detail.startswith("SCAN ") and detail not in subqueries
+            and not (bounded and parent == 0 and " INDEX " in detail)]
+
+
+def collect_statements():
+    """Run every model call on a scratch database and trace its statements.
+
+    Returns (name, sql) pairs plus the path of the scratch database.
+    """
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    original = db_config.DATABASE_FILE
+    db_config.DATABASE_FILE = path
+    statements = []
+    try:
+        pool = get_pool(path)
+        conn = pool.checkout()
+        migrate(conn)
+        _seed(conn)
+        current = [None]
+        conn.set_trace_callback(lambda sql: statements.append((current[0], sql)))
+        conn.close()
+        clear_cache()
+        for name, func, args in model_calls():
+            current[0] = name
+            func(*args)
+        # Single-threaded, so the pool kept handing back the traced connection
+        if not statements:
+            raise RuntimeError("No statements traced; pool did not reuse the connection")
+    finally:
+        db_config.DATABASE_FILE = original
+        close_all_pools()
+        close_watchers()
+    return statements, path
+
+
+def check_query_plans():
+    """Return a list of (function, sql, scans) for every plan regression"""
+    statements, path = collect_statements()
+    failures = []
+    try:
+        conn = sqlite3.connect(path)
+        for name, sql in statements:
+            if name is None or not sql.lstrip().upper().startswith(EXPLAINED):
+                continue
+            scans = _scans(conn, sql, name in BOUNDED_LISTINGS)
+            if name in FULL_LISTINGS:
+                scans = scans[1:]
+            if scans:
+                failures.append((name, " ".join(sql.split()), scans))
+        conn.close()
+    finally:
+        os.remove(path)
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return failures
+
+
+if __name__ == "__main__":
+    failures = check_query_plans()
+    for name, sql, scans in failures:
+        print(f"{name}: {'; '.join(scans)}\n    {sql}")
+    if failures:
+        sys.exit(1)
+    print("All model queries use indexed access paths")
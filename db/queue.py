@@ -0,0 +1,40 @@
+from .cache import bump_generation
+from .connection import get_db_connection
+
+# Derived tables (ExerciseStats, GoalProgress, TrainingLoad) are kept
+# current by triggers that queue the keys whose inputs changed in a
+# <Table>Dirty table, and by a drain that recomputes the queued keys.
+# Only the drain writes: the read functions of a derived table just SELECT,
+# so they can run on the read-only fan-out workers (see db.fanout) and
+# callers drain on a writable connection first.
+
+
+def drain_queue(queue, recompute, full=False, idle=None):
+    """Recompute the keys queued in a dirty table in one write transaction.
+
+    recompute(conn) does the work on the pooled connection, removes the
+    keys it handled from the queue and returns the fields of the result.
+    Unless full, an empty queue returns idle without taking the write
+    lock. Returns {"success": True, ...} or {"success": False, "error"}.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if not full:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {queue})")
+            if not cursor.fetchone()[0]:
+                return {"success": True, **(idle or {})}
+        # Hold the write lock so no change lands between reading and
+        # clearing the queue
+        cursor.execute("BEGIN IMMEDIATE")
+        result = {"success": True, **recompute(conn)}
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        result = {"success": False, "error": str(e)}
+    finally:
+        conn.close()
+    if result["success"]:
+        # Reads cached while the keys were queued saw the old rows
+        bump_generation()
+    return result
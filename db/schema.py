@@ -1,6 +1,24 @@
+import sqlite3
+
+
+def execute_script(cursor, script):
+    """Run a multi-statement SQL script statement by statement.
+
+    Unlike cursor.executescript() this does not commit first, so the
+    statements join whatever transaction the caller has open.
+    """
+    statement = ""
+    for chunk in script.split(";"):
+        statement += chunk + ";"
+        if sqlite3.complete_statement(statement):
+            if statement.strip(" \t\r\n;"):
+                cursor.execute(statement)
+            statement = ""
+
+
 def create_tables(cursor):
     """Create all database tables if they don't exist"""
-    cursor.executescript('''
+    execute_script(cursor, '''
         CREATE TABLE IF NOT EXISTS Users (
           userID INTEGER PRIMARY KEY AUTOINCREMENT,
           fName VARCHAR(32) NOT NULL,
@@ -111,4 +129,1010 @@ def create_tables(cursor):
             Goals g ON w.userID = g.userID
         GROUP BY 
             e.exerciseID, e.name, e.muscleGroup;
-    ''')
\ No newline at end of file
+    ''')
+
+def create_indexes(cursor):
+    """Create secondary indexes for the model and view access paths"""
+    execute_script(cursor, '''
+        -- get_workouts_by_user, the view joins and Users ON DELETE CASCADE
+        CREATE INDEX IF NOT EXISTS idx_workout_user_start
+            ON Workout (userID, startTime, endTime, maxHR, workoutType);
+
+        -- get_health_by_user and lookups by (userID, date)
+        CREATE INDEX IF NOT EXISTS idx_health_user_date
+            ON Health (userID, date, heartrate, VO2max, HRvariation, sleeptime);
+
+        -- get_all_workouts ORDER BY startTime
+        CREATE INDEX IF NOT EXISTS idx_workout_start
+            ON Workout (startTime);
+
+        -- delete_exercise usage count, Exercise ON DELETE CASCADE and the
+        -- per-exercise aggregates
+        CREATE INDEX IF NOT EXISTS idx_weightlift_exercise
+            ON Weightlift (exerciseID, workoutID, weight, reps);
+    ''')
+
+
+def create_user_progress_summary(cursor):
+    """Replace the UserProgressOverview join view with a trigger-maintained table.
+
+    The old view joined Workout, Health and Goals on userID before grouping,
+    which multiplied the rows and skewed SUM/AVG. UserProgressSummary keeps
+    per-user sums and counts that the triggers below adjust on every write,
+    and the view now only divides them out.
+    """
+    execute_script(cursor, '''
+        CREATE TABLE IF NOT EXISTS UserProgressSummary (
+          userID INTEGER PRIMARY KEY,
+          total_workouts INT NOT NULL DEFAULT 0,
+          total_workout_minutes FLOAT NOT NULL DEFAULT 0,
+          VO2max_sum FLOAT NOT NULL DEFAULT 0,
+          VO2max_count INT NOT NULL DEFAULT 0,
+          HRV_sum FLOAT NOT NULL DEFAULT 0,
+          HRV_count INT NOT NULL DEFAULT 0,
+          sleep_sum FLOAT NOT NULL DEFAULT 0,
+          sleep_count INT NOT NULL DEFAULT 0,
+          completed_goals INT NOT NULL DEFAULT 0,
+          pending_goals INT NOT NULL DEFAULT 0,
+          FOREIGN KEY (userID) REFERENCES Users(userID) ON DELETE CASCADE
+        );
+
+        DELETE FROM UserProgressSummary;
+        INSERT INTO UserProgressSummary (
+            userID, total_workouts, total_workout_minutes,
+            VO2max_sum, VO2max_count, HRV_sum, HRV_count,
+            sleep_sum, sleep_count, completed_goals, pending_goals)
+        SELECT
+            u.userID,
+            COALESCE(w.total_workouts, 0),
+            COALESCE(w.total_minutes, 0),
+            COALESCE(h.VO2max_sum, 0), COALESCE(h.VO2max_count, 0),
+            COALESCE(h.HRV_sum, 0), COALESCE(h.HRV_count, 0),
+            COALESCE(h.sleep_sum, 0), COALESCE(h.sleep_count, 0),
+            COALESCE(g.completed_goals, 0), COALESCE(g.pending_goals, 0)
+        FROM Users u
+        LEFT JOIN (
+            SELECT userID, COUNT(*) AS total_workouts,
+                   SUM((JULIANDAY(endTime) - JULIANDAY(startTime)) * 24 * 60) AS total_minutes
+            FROM Workout GROUP BY userID
+        ) w ON w.userID = u.userID
+        LEFT JOIN (
+            SELECT userID,
+                   TOTAL(VO2max) AS VO2max_sum, COUNT(VO2max) AS VO2max_count,
+                   TOTAL(HRvariation) AS HRV_sum, COUNT(HRvariation) AS HRV_count,
+                   TOTAL(sleeptime) AS sleep_sum, COUNT(sleeptime) AS sleep_count
+            FROM Health GROUP BY userID
+        ) h ON h.userID = u.userID
+        LEFT JOIN (
+            SELECT userID,
+                   SUM(completed = 1) AS completed_goals,
+                   SUM(completed = 0) AS pending_goals
+            FROM Goals GROUP BY userID
+        ) g ON g.userID = u.userID;
+
+        -- Users
+        CREATE TRIGGER IF NOT EXISTS trg_users_progress_insert
+        AFTER INSERT ON Users
+        BEGIN
+            INSERT OR IGNORE INTO UserProgressSummary (userID) VALUES (NEW.userID);
+        END;
+
+        -- Workout
+        CREATE TRIGGER IF NOT EXISTS trg_workout_progress_insert
+        AFTER INSERT ON Workout
+        BEGIN
+            UPDATE UserProgressSummary SET
+                total_workouts = total_workouts + 1,
+                total_workout_minutes = total_workout_minutes
+                    + (JULIANDAY(NEW.endTime) - JULIANDAY(NEW.startTime)) * 24 * 60
+            WHERE userID = NEW.userID;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_workout_progress_delete
+        AFTER DELETE ON Workout
+        BEGIN
+            UPDATE UserProgressSummary SET
+                total_workouts = total_workouts - 1,
+                total_workout_minutes = total_workout_minutes
+                    - (JULIANDAY(OLD.endTime) - JULIANDAY(OLD.startTime)) * 24 * 60
+            WHERE userID = OLD.userID;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_workout_progress_update
+        AFTER UPDATE OF userID, startTime, endTime ON Workout
+        BEGIN
+            UPDATE UserProgressSummary SET
+                total_workouts = total_workouts - 1,
+                total_workout_minutes = total_workout_minutes
+                    - (JULIANDAY(OLD.endTime) - JULIANDAY(OLD.startTime)) * 24 * 60
+            WHERE userID = OLD.userID;
+            UPDATE UserProgressSummary SET
+                total_workouts = total_workouts + 1,
+                total_workout_minutes = total_workout_minutes
+                    + (JULIANDAY(NEW.endTime) - JULIANDAY(NEW.startTime)) * 24 * 60
+            WHERE userID = NEW.userID;
+        END;
+
+        -- Health
+        CREATE TRIGGER IF NOT EXISTS trg_health_progress_insert
+        AFTER INSERT ON Health
+        BEGIN
+            UPDATE UserProgressSummary SET
+                VO2max_sum = VO2max_sum + COALESCE(NEW.VO2max, 0),
+                VO2max_count = VO2max_count + (NEW.VO2max IS NOT NULL),
+                HRV_sum = HRV_sum + COALESCE(NEW.HRvariation, 0),
+                HRV_count = HRV_count + (NEW.HRvariation IS NOT NULL),
+                sleep_sum = sleep_sum + COALESCE(NEW.sleeptime, 0),
+                sleep_count = sleep_count + (NEW.sleeptime IS NOT NULL)
+            WHERE userID = NEW.userID;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_health_progress_delete
+        AFTER DELETE ON Health
+        BEGIN
+            UPDATE UserProgressSummary SET
+                VO2max_sum = VO2max_sum - COALESCE(OLD.VO2max, 0),
+                VO2max_count = VO2max_count - (OLD.VO2max IS NOT NULL),
+                HRV_sum = HRV_sum - COALESCE(OLD.HRvariation, 0),
+                HRV_count = HRV_count - (OLD.HRvariation IS NOT NULL),
+                sleep_sum = sleep_sum - COALESCE(OLD.sleeptime, 0),
+                sleep_count = sleep_count - (OLD.sleeptime IS NOT NULL)
+            WHERE userID = OLD.userID;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_health_progress_update
+        AFTER UPDATE OF userID, VO2max, HRvariation, sleeptime ON Health
+        BEGIN
+            UPDATE UserProgressSummary SET
+                VO2max_sum = VO2max_sum - COALESCE(OLD.VO2max, 0),
+                VO2max_count = VO2max_count - (OLD.VO2max IS NOT NULL),
+                HRV_sum = HRV_sum - COALESCE(OLD.HRvariation, 0),
+                HRV_count = HRV_count - (OLD.HRvariation IS NOT NULL),
+                sleep_sum = sleep_sum - COALESCE(OLD.sleeptime, 0),
+                sleep_count = sleep_count - (OLD.sleeptime IS NOT NULL)
+            WHERE userID = OLD.userID;
+            UPDATE UserProgressSummary SET
+                VO2max_sum = VO2max_sum + COALESCE(NEW.VO2max, 0),
+                VO2max_count = VO2max_count + (NEW.VO2max IS NOT NULL),
+                HRV_sum = HRV_sum + COALESCE(NEW.HRvariation, 0),
+                HRV_count = HRV_count + (NEW.HRvariation IS NOT NULL),
+                sleep_sum = sleep_sum + COALESCE(NEW.sleeptime, 0),
+                sleep_count = sleep_count + (NEW.sleeptime IS NOT NULL)
+            WHERE userID = NEW.userID;
+        END;
+
+        -- Goals
+        CREATE TRIGGER IF NOT EXISTS trg_goals_progress_insert
+        AFTER INSERT ON Goals
+        BEGIN
+            UPDATE UserProgressSummary SET
+                completed_goals = completed_goals + (NEW.completed = 1),
+                pending_goals = pending_goals + (NEW.completed = 0)
+            WHERE userID = NEW.userID;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_goals_progress_delete
+        AFTER DELETE ON Goals
+        BEGIN
+            UPDATE UserProgressSummary SET
+                completed_goals = completed_goals - (OLD.completed = 1),
+                pending_goals = pending_goals - (OLD.completed = 0)
+            WHERE userID = OLD.userID;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_goals_progress_update
+        AFTER UPDATE OF userID, completed ON Goals
+        BEGIN
+            UPDATE UserProgressSummary SET
+                completed_goals = completed_goals - (OLD.completed = 1),
+                pending_goals = pending_goals - (OLD.completed = 0)
+            WHERE userID = OLD.userID;
+            UPDATE UserProgressSummary SET
+                completed_goals = completed_goals + (NEW.completed = 1),
+                pending_goals = pending_goals + (NEW.completed = 0)
+            WHERE userID = NEW.userID;
+        END;
+
+        DROP VIEW IF EXISTS UserProgressOverview;
+        CREATE VIEW UserProgressOverview AS
+        SELECT
+            u.userID,
+            u.fName,
+            u.lName,
+            s.total_workouts,
+            s.total_workout_minutes,
+            s.VO2max_sum / NULLIF(s.VO2max_count, 0) AS avg_VO2max,
+            s.HRV_sum / NULLIF(s.HRV_count, 0) AS avg_HRV,
+            s.sleep_sum / NULLIF(s.sleep_count, 0) AS avg_sleep,
+            s.completed_goals,
+            s.pending_goals
+        FROM
+            Users u
+        JOIN
+            UserProgressSummary s ON s.userID = u.userID;
+    ''')
+
+
+# Moving a workout to another user changes users_performed
+WORKOUT_EXERCISE_STATS_TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS trg_exercise_stats_workout_user
+    AFTER UPDATE OF userID ON Workout
+    BEGIN
+        INSERT OR IGNORE INTO ExerciseStatsDirty (exerciseID)
+        SELECT exerciseID FROM Weightlift WHERE workoutID = NEW.workoutID;
+    END;
+'''
+
+
+def create_exercise_stats(cursor):
+    """Replace the ExerciseEffectivenessAnalysis join view with a materialized table.
+
+    ExerciseStats holds per-exercise aggregates. Triggers only record which
+    exercises were touched in ExerciseStatsDirty; models.analytics.refresh()
+    recomputes those rows. Every exercise starts out dirty so the first
+    refresh fills the table.
+    """
+    execute_script(cursor, '''
+        CREATE TABLE IF NOT EXISTS ExerciseStats (
+          exerciseID INTEGER PRIMARY KEY,
+          times_performed INT NOT NULL DEFAULT 0,
+          users_performed INT NOT NULL DEFAULT 0,
+          weight_sum FLOAT NOT NULL DEFAULT 0,
+          weight_count INT NOT NULL DEFAULT 0,
+          reps_sum FLOAT NOT NULL DEFAULT 0,
+          reps_count INT NOT NULL DEFAULT 0,
+          related_goals_completed INT NOT NULL DEFAULT 0,
+          FOREIGN KEY (exerciseID) REFERENCES Exercise(exerciseID) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS ExerciseStatsDirty (
+          exerciseID INTEGER PRIMARY KEY
+        );
+
+        INSERT OR IGNORE INTO ExerciseStatsDirty (exerciseID)
+        SELECT exerciseID FROM Exercise;
+
+        CREATE TRIGGER IF NOT EXISTS trg_exercise_stats_exercise_insert
+        AFTER INSERT ON Exercise
+        BEGIN
+            INSERT OR IGNORE INTO ExerciseStatsDirty (exerciseID) VALUES (NEW.exerciseID);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_exercise_stats_weightlift_insert
+        AFTER INSERT ON Weightlift
+        BEGIN
+            INSERT OR IGNORE INTO ExerciseStatsDirty (exerciseID) VALUES (NEW.exerciseID);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_exercise_stats_weightlift_delete
+        AFTER DELETE ON Weightlift
+        BEGIN
+            INSERT OR IGNORE INTO ExerciseStatsDirty (exerciseID) VALUES (OLD.exerciseID);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_exercise_stats_weightlift_update
+        AFTER UPDATE ON Weightlift
+        BEGIN
+            INSERT OR IGNORE INTO ExerciseStatsDirty (exerciseID) VALUES (OLD.exerciseID);
+            INSERT OR IGNORE INTO ExerciseStatsDirty (exerciseID) VALUES (NEW.exerciseID);
+        END;
+
+        -- A user's 'Lift Weights' goal counts towards every exercise they did
+        CREATE TRIGGER IF NOT EXISTS trg_exercise_stats_goal_insert
+        AFTER INSERT ON Goals
+        WHEN NEW.goalName = 'Lift Weights'
+        BEGIN
+            INSERT OR IGNORE INTO ExerciseStatsDirty (exerciseID)
+            SELECT wl.exerciseID FROM Workout w
+            JOIN Weightlift wl ON wl.workoutID = w.workoutID
+            WHERE w.userID = NEW.userID;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_exercise_stats_goal_delete
+        AFTER DELETE ON Goals
+        WHEN OLD.goalName = 'Lift Weights'
+        BEGIN
+            INSERT OR IGNORE INTO ExerciseStatsDirty (exerciseID)
+            SELECT wl.exerciseID FROM Workout w
+            JOIN Weightlift wl ON wl.workoutID = w.workoutID
+            WHERE w.userID = OLD.userID;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_exercise_stats_goal_update
+        AFTER UPDATE ON Goals
+        WHEN OLD.goalName = 'Lift Weights' OR NEW.goalName = 'Lift Weights'
+        BEGIN
+            INSERT OR IGNORE INTO ExerciseStatsDirty (exerciseID)
+            SELECT wl.exerciseID FROM Workout w
+            JOIN Weightlift wl ON wl.workoutID = w.workoutID
+            WHERE w.userID IN (OLD.userID, NEW.userID);
+        END;
+
+        DROP VIEW IF EXISTS ExerciseEffectivenessAnalysis;
+        CREATE VIEW ExerciseEffectivenessAnalysis AS
+        SELECT
+            e.exerciseID,
+            e.name AS exercise_name,
+            e.muscleGroup,
+            COALESCE(s.times_performed, 0) AS times_performed,
+            COALESCE(s.users_performed, 0) AS users_performed,
+            s.weight_sum / NULLIF(s.weight_count, 0) AS avg_weight,
+            s.reps_sum / NULLIF(s.reps_count, 0) AS avg_reps,
+            COALESCE(s.related_goals_completed, 0) AS related_goals_completed
+        FROM
+            Exercise e
+        LEFT JOIN
+            ExerciseStats s ON s.exerciseID = e.exerciseID;
+    ''')
+    execute_script(cursor, WORKOUT_EXERCISE_STATS_TRIGGER)
+
+
+def create_row_counts(cursor):
+    """Keep row counts of the main tables in a trigger-maintained table"""
+    execute_script(cursor, '''
+        CREATE TABLE IF NOT EXISTS TableRowCounts (
+          tableName VARCHAR(32) PRIMARY KEY,
+          rowCount INT NOT NULL DEFAULT 0
+        );
+
+        DELETE FROM TableRowCounts;
+        INSERT INTO TableRowCounts (tableName, rowCount)
+        SELECT 'Users', COUNT(*) FROM Users
+        UNION ALL SELECT 'Health', COUNT(*) FROM Health
+        UNION ALL SELECT 'Workout', COUNT(*) FROM Workout
+        UNION ALL SELECT 'Goals', COUNT(*) FROM Goals;
+    ''')
+    for table in ("Users", "Health", "Workout", "Goals"):
+        create_row_count_triggers(cursor, table)
+
+
+def create_row_count_triggers(cursor, table):
+    """Triggers that keep a table's TableRowCounts entry current"""
+    execute_script(cursor, f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_count_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            UPDATE TableRowCounts SET rowCount = rowCount + 1
+            WHERE tableName = '{table}';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_count_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            UPDATE TableRowCounts SET rowCount = rowCount - 1
+            WHERE tableName = '{table}';
+        END;
+    ''')
+
+
+HEALTH_METRICS = ("heartrate", "VO2max", "HRvariation", "sleeptime")
+
+# period -> (SQL for the bucket start of a date expression, bucket end modifiers)
+HEALTH_ROLLUP_PERIODS = {
+    "week": ("date({d}, 'weekday 0', '-6 days')", "'+6 days'"),
+    "month": ("date({d}, 'start of month')", "'+1 month', '-1 day'"),
+}
+
+
+def _health_rollup_aggregates():
+    return ",\n".join(
+        f"AVG({m}), MIN({m}), MAX({m})" for m in HEALTH_METRICS)
+
+
+def _health_rollup_recompute(user, day, period):
+    """SQL that rebuilds the rollup bucket of one user and date from Health"""
+    start_sql, end_modifiers = HEALTH_ROLLUP_PERIODS[period]
+    start = start_sql.format(d=day)
+    return f'''
+        DELETE FROM HealthRollup
+        WHERE userID = {user} AND period = '{period}' AND periodStart = {start};
+        INSERT INTO HealthRollup
+        SELECT {user}, '{period}', {start}, COUNT(*),
+               {_health_rollup_aggregates()}
+        FROM Health
+        WHERE userID = {user}
+          AND date BETWEEN {start} AND date({start}, {end_modifiers})
+        HAVING COUNT(*) > 0;
+    '''
+
+
+def create_health_rollups(cursor):
+    """Weekly and monthly per-user Health rollups kept current by triggers.
+
+    Daily resolution is the Health table itself, which already holds one
+    row per user and day. Triggers rebuild only the week and month buckets
+    of the rows they touch; min/max can't be decremented, so the bucket is
+    re-aggregated from its (at most 31) Health rows.
+    """
+    columns = ",\n".join(
+        f"{m}_avg FLOAT, {m}_min FLOAT, {m}_max FLOAT" for m in HEALTH_METRICS)
+    execute_script(cursor, f'''
+        CREATE TABLE IF NOT EXISTS HealthRollup (
+          userID INT NOT NULL,
+          period VARCHAR(5) NOT NULL,
+          periodStart DATE NOT NULL,
+          days INT NOT NULL,
+          {columns},
+          PRIMARY KEY (userID, period, periodStart),
+          FOREIGN KEY (userID) REFERENCES Users(userID) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+
+        DELETE FROM HealthRollup;
+    ''')
+    for period, (start_sql, _) in HEALTH_ROLLUP_PERIODS.items():
+        start = start_sql.format(d="date")
+        execute_script(cursor, f'''
+            INSERT INTO HealthRollup
+            SELECT userID, '{period}', {start}, COUNT(*),
+                   {_health_rollup_aggregates()}
+            FROM Health
+            GROUP BY userID, {start};
+        ''')
+
+    create_health_rollup_triggers(cursor)
+
+
+def create_health_rollup_triggers(cursor):
+    """Triggers that rebuild the rollup buckets of each Health row written"""
+    for event, rows in (("INSERT", ("NEW",)), ("DELETE", ("OLD",)),
+                        ("UPDATE", ("OLD", "NEW"))):
+        body = "".join(
+            _health_rollup_recompute(f"{row}.userID", f"{row}.date", period)
+            for row in rows for period in HEALTH_ROLLUP_PERIODS)
+        execute_script(cursor, f'''
+            CREATE TRIGGER IF NOT EXISTS trg_health_rollup_{event.lower()}
+            AFTER {event} ON Health
+            BEGIN
+                {body}
+            END;
+        ''')
+
+
+def drop_health_rollup_triggers(cursor):
+    """Stop maintaining HealthRollup per row, e.g. for a bulk load.
+
+    Run it inside a transaction that also calls refresh_health_rollups()
+    and create_health_rollup_triggers(), so no other connection sees Health
+    without the triggers.
+    """
+    for event in ("insert", "delete", "update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_health_rollup_{event}")
+
+
+def refresh_health_rollups(cursor, user_days):
+    """Rebuild the rollup buckets of the given (userID, date) pairs at once.
+
+    The set-based counterpart of the rollup triggers: every bucket is
+    re-aggregated once, however many of its rows were written.
+    """
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS HealthRollupTouched (
+          userID INT NOT NULL,
+          date DATE NOT NULL
+        )
+    """)
+    cursor.execute("DELETE FROM temp.HealthRollupTouched")
+    cursor.executemany("INSERT INTO temp.HealthRollupTouched VALUES (?, ?)",
+                       user_days)
+    for period, (start_sql, end_modifiers) in HEALTH_ROLLUP_PERIODS.items():
+        buckets = (f"SELECT DISTINCT userID, {start_sql.format(d='date')} AS periodStart "
+                   f"FROM temp.HealthRollupTouched")
+        execute_script(cursor, f'''
+            DELETE FROM HealthRollup
+            WHERE period = '{period}' AND (userID, periodStart) IN ({buckets});
+            INSERT INTO HealthRollup
+            SELECT b.userID, '{period}', b.periodStart, COUNT(*),
+                   {_health_rollup_aggregates()}
+            FROM ({buckets}) b
+            JOIN Health h ON h.userID = b.userID
+             AND h.date BETWEEN b.periodStart AND date(b.periodStart, {end_modifiers})
+            GROUP BY b.userID, b.periodStart;
+        ''')
+    cursor.execute("DELETE FROM temp.HealthRollupTouched")
+
+
+def _epoch_seconds(column):
+    """SQL converting a DATETIME text column to integer epoch seconds"""
+    return (f"CASE WHEN typeof({column}) IN ('integer', 'real') "
+            f"THEN CAST({column} AS INTEGER) "
+            f"ELSE CAST(strftime('%s', {column}) AS INTEGER) END")
+
+
+def store_workout_epoch_times(cursor):
+    """Rebuild Workout with epoch-second times and a stored duration column.
+
+    startTime/endTime become integer seconds since the epoch (the wall-clock
+    time the user entered, read as UTC) and durationMinutes is a stored
+    generated column, so aggregates no longer call JULIANDAY per row. A
+    stored generated column can't be added with ALTER TABLE, so the table
+    is copied, which drops its indexes and triggers; they are recreated
+    here with the duration taken from durationMinutes.
+    """
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'Workout'")
+    row = cursor.fetchone()
+    sequence = row[0] if row else 0
+
+    # Keep other tables' triggers pointing at "Workout" through the rename
+    cursor.execute("PRAGMA legacy_alter_table = ON")
+    execute_script(cursor, f'''
+        CREATE TABLE Workout_new (
+          workoutID INTEGER PRIMARY KEY AUTOINCREMENT,
+          userID INT NOT NULL,
+          startTime INTEGER NOT NULL,
+          endTime INTEGER NOT NULL,
+          maxHR INT,
+          workoutType VARCHAR(20) NOT NULL,
+          durationMinutes FLOAT GENERATED ALWAYS AS ((endTime - startTime) / 60.0) STORED,
+          CHECK (endTime > startTime),
+          CHECK (workoutType IN ('Run', 'Weightlift')),
+          FOREIGN KEY(userID) REFERENCES Users(userID) ON DELETE CASCADE
+        );
+
+        INSERT INTO Workout_new (workoutID, userID, startTime, endTime, maxHR, workoutType)
+        SELECT workoutID, userID, {_epoch_seconds("startTime")},
+               {_epoch_seconds("endTime")}, maxHR, workoutType
+        FROM Workout;
+
+        DROP TABLE Workout;
+        ALTER TABLE Workout_new RENAME TO Workout;
+    ''')
+    cursor.execute("PRAGMA legacy_alter_table = OFF")
+    cursor.execute(
+        "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'Workout'",
+        (sequence,))
+
+    execute_script(cursor, '''
+        CREATE INDEX IF NOT EXISTS idx_workout_user_start
+            ON Workout (userID, startTime, endTime, maxHR, workoutType, durationMinutes);
+
+        CREATE INDEX IF NOT EXISTS idx_workout_start
+            ON Workout (startTime);
+
+        UPDATE UserProgressSummary SET total_workout_minutes = (
+            SELECT TOTAL(durationMinutes) FROM Workout w
+            WHERE w.userID = UserProgressSummary.userID);
+
+        CREATE TRIGGER IF NOT EXISTS trg_workout_progress_insert
+        AFTER INSERT ON Workout
+        BEGIN
+            UPDATE UserProgressSummary SET
+                total_workouts = total_workouts + 1,
+                total_workout_minutes = total_workout_minutes + NEW.durationMinutes
+            WHERE userID = NEW.userID;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_workout_progress_delete
+        AFTER DELETE ON Workout
+        BEGIN
+            UPDATE UserProgressSummary SET
+                total_workouts = total_workouts - 1,
+                total_workout_minutes = total_workout_minutes - OLD.durationMinutes
+            WHERE userID = OLD.userID;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_workout_progress_update
+        AFTER UPDATE OF userID, startTime, endTime ON Workout
+        BEGIN
+            UPDATE UserProgressSummary SET
+                total_workouts = total_workouts - 1,
+                total_workout_minutes = total_workout_minutes - OLD.durationMinutes
+            WHERE userID = OLD.userID;
+            UPDATE UserProgressSummary SET
+                total_workouts = total_workouts + 1,
+                total_workout_minutes = total_workout_minutes + NEW.durationMinutes
+            WHERE userID = NEW.userID;
+        END;
+    ''')
+    execute_script(cursor, WORKOUT_EXERCISE_STATS_TRIGGER)
+    create_row_count_triggers(cursor, "Workout")
+
+
+def store_run_pace_seconds(cursor):
+    """Rebuild Run with pace stored as integer seconds per km.
+
+    Pace was CHAR(5) "mm:ss" text, which has to be parsed row by row before
+    it can be averaged or weighted. Column types can't be changed with
+    ALTER TABLE, so the table is copied; nothing else references Run.
+    """
+    execute_script(cursor, '''
+        CREATE TABLE Run_new (
+          workoutID INT NOT NULL,
+          intervalNr INT NOT NULL,
+          distance DECIMAL(6,2) NOT NULL,
+          pace INTEGER NOT NULL CHECK (pace >= 0),
+          incline DECIMAL(3,1),
+          PRIMARY KEY (workoutID, intervalNr),
+          FOREIGN KEY (workoutID) REFERENCES Workout(workoutID) ON DELETE CASCADE
+        );
+
+        INSERT INTO Run_new (workoutID, intervalNr, distance, pace, incline)
+        SELECT workoutID, intervalNr, distance,
+               CASE WHEN typeof(pace) IN ('integer', 'real')
+                    THEN CAST(pace AS INTEGER)
+                    ELSE CAST(substr(pace, 1, instr(pace, ':') - 1) AS INTEGER) * 60
+                         + CAST(substr(pace, instr(pace, ':') + 1) AS INTEGER)
+               END,
+               incline
+        FROM Run;
+
+        DROP TABLE Run;
+        ALTER TABLE Run_new RENAME TO Run;
+    ''')
+
+
+def _training_load_mark(user, day):
+    """SQL statement queueing a user's training load for recompute from a day"""
+    return f'''
+            INSERT INTO TrainingLoadDirty (userID, fromDay) VALUES ({user}, {day})
+            ON CONFLICT (userID) DO UPDATE SET fromDay = MIN(fromDay, excluded.fromDay);'''
+
+
+def create_training_load(cursor):
+    """Create the TrainingLoad table and the queue that keeps it current.
+
+    TrainingLoad holds each user's daily training load with its acute and
+    chronic averages; models.training_load fills it. Triggers record, per
+    user, the earliest day (days since the epoch) whose load may have
+    changed in TrainingLoadDirty. Every user with workouts starts out
+    queued from their first workout.
+    """
+    workout_day = "{row}.startTime / 86400"
+    health_day = "CAST(strftime('%s', {row}.date) AS INTEGER) / 86400"
+    execute_script(cursor, f'''
+        CREATE TABLE IF NOT EXISTS TrainingLoad (
+          userID INT NOT NULL,
+          date DATE NOT NULL,
+          load FLOAT NOT NULL,
+          acute FLOAT NOT NULL,
+          chronic FLOAT NOT NULL,
+          acwr FLOAT,
+          PRIMARY KEY (userID, date),
+          FOREIGN KEY (userID) REFERENCES Users(userID) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS TrainingLoadDirty (
+          userID INTEGER PRIMARY KEY,
+          fromDay INT NOT NULL
+        );
+
+        INSERT OR IGNORE INTO TrainingLoadDirty (userID, fromDay)
+        SELECT userID, MIN(startTime) / 86400 FROM Workout GROUP BY userID;
+
+        CREATE TRIGGER IF NOT EXISTS trg_training_load_workout_insert
+        AFTER INSERT ON Workout
+        BEGIN
+            {_training_load_mark("NEW.userID", workout_day.format(row="NEW"))}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_training_load_workout_delete
+        AFTER DELETE ON Workout
+        BEGIN
+            {_training_load_mark("OLD.userID", workout_day.format(row="OLD"))}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_training_load_workout_update
+        AFTER UPDATE OF userID, startTime, endTime, maxHR ON Workout
+        BEGIN
+            {_training_load_mark("OLD.userID", workout_day.format(row="OLD"))}
+            {_training_load_mark("NEW.userID", workout_day.format(row="NEW"))}
+        END;
+
+        -- Resting heart rate carries forward to later workouts
+        CREATE TRIGGER IF NOT EXISTS trg_training_load_health_insert
+        AFTER INSERT ON Health
+        WHEN NEW.heartrate IS NOT NULL
+        BEGIN
+            {_training_load_mark("NEW.userID", health_day.format(row="NEW"))}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_training_load_health_delete
+        AFTER DELETE ON Health
+        WHEN OLD.heartrate IS NOT NULL
+        BEGIN
+            {_training_load_mark("OLD.userID", health_day.format(row="OLD"))}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_training_load_health_update
+        AFTER UPDATE OF userID, date, heartrate ON Health
+        BEGIN
+            {_training_load_mark("OLD.userID", health_day.format(row="OLD"))}
+            {_training_load_mark("NEW.userID", health_day.format(row="NEW"))}
+        END;
+
+        -- Age and sex feed into every workout's load
+        CREATE TRIGGER IF NOT EXISTS trg_training_load_user_update
+        AFTER UPDATE OF DOB, sex ON Users
+        BEGIN
+            INSERT INTO TrainingLoadDirty (userID, fromDay)
+            SELECT NEW.userID, MIN(startTime) / 86400 FROM Workout
+            WHERE userID = NEW.userID
+            HAVING COUNT(*) > 0
+            ON CONFLICT (userID) DO UPDATE SET fromDay = MIN(fromDay, excluded.fromDay);
+        END;
+    ''')
+
+
+def _estimated_1rm(row):
+    """SQL for a set's Epley estimated one-rep max"""
+    return (f"CASE WHEN {row}.reps = 1 THEN {row}.weight "
+            f"ELSE {row}.weight * (1 + {row}.reps / 30.0) END")
+
+
+def personal_records_select(where="1"):
+    """SELECT producing PersonalRecord rows for the sets matching where.
+
+    Ties on the estimated 1RM go to the earliest workout, both here and in
+    the insert trigger, so incremental updates and rebuilds agree.
+    """
+    return f'''
+        SELECT userID, exerciseID, maxWeight, best1RM, workoutID
+        FROM (
+            SELECT w.userID, wl.exerciseID,
+                   MAX(wl.weight) OVER k AS maxWeight,
+                   {_estimated_1rm("wl")} AS best1RM,
+                   wl.workoutID,
+                   ROW_NUMBER() OVER (k ORDER BY {_estimated_1rm("wl")} DESC,
+                                      wl.workoutID) AS position
+            FROM Weightlift wl
+            JOIN Workout w ON w.workoutID = wl.workoutID
+            JOIN Users u ON u.userID = w.userID
+            WHERE wl.weight IS NOT NULL AND ({where})
+            WINDOW k AS (PARTITION BY w.userID, wl.exerciseID)
+        )
+        WHERE position = 1'''
+
+
+def _personal_record_recompute(row):
+    """Trigger SQL recomputing the record a removed set may have held"""
+    user = f"(SELECT userID FROM Workout WHERE workoutID = {row}.workoutID)"
+    return f'''
+            DELETE FROM PersonalRecord
+            WHERE userID = {user} AND exerciseID = {row}.exerciseID
+              AND (maxWeight <= {row}.weight OR best1RM <= {_estimated_1rm(row)});
+            INSERT INTO PersonalRecord (userID, exerciseID, maxWeight, best1RM, workoutID)
+            {personal_records_select(
+                f"w.userID = {user} AND wl.exerciseID = {row}.exerciseID "
+                f"AND NOT EXISTS (SELECT 1 FROM PersonalRecord p WHERE p.userID = {user} "
+                f"AND p.exerciseID = {row}.exerciseID)")};'''
+
+
+def _personal_record_add(row):
+    """Trigger SQL folding a new set into its user's record"""
+    return f'''
+            INSERT INTO PersonalRecord (userID, exerciseID, maxWeight, best1RM, workoutID)
+            SELECT w.userID, {row}.exerciseID, {row}.weight, {_estimated_1rm(row)}, {row}.workoutID
+            FROM Workout w
+            WHERE w.workoutID = {row}.workoutID AND {row}.weight IS NOT NULL
+            ON CONFLICT (userID, exerciseID) DO UPDATE SET
+                maxWeight = MAX(maxWeight, excluded.maxWeight),
+                workoutID = CASE
+                    WHEN excluded.best1RM > best1RM
+                      OR (excluded.best1RM = best1RM AND excluded.workoutID < workoutID)
+                    THEN excluded.workoutID ELSE workoutID END,
+                best1RM = MAX(best1RM, excluded.best1RM);'''
+
+
+def create_personal_records(cursor):
+    """Create the PersonalRecord table, backfill it and keep it current.
+
+    One row per (userID, exerciseID) with the heaviest weight lifted and the
+    best Epley estimated 1RM with the workout it came from. A new set can
+    only raise a record, so inserts compare against the stored row; removing
+    a set re-aggregates that user's exercise only when the set held the
+    record. Workouts drop their sets in a BEFORE DELETE trigger because the
+    Weightlift triggers need the workout's userID, which an ON DELETE
+    CASCADE has already removed.
+    """
+    execute_script(cursor, f'''
+        CREATE TABLE IF NOT EXISTS PersonalRecord (
+          userID INT NOT NULL,
+          exerciseID INT NOT NULL,
+          maxWeight FLOAT NOT NULL,
+          best1RM FLOAT NOT NULL,
+          workoutID INT NOT NULL,
+          PRIMARY KEY (userID, exerciseID),
+          FOREIGN KEY (userID) REFERENCES Users(userID) ON DELETE CASCADE,
+          FOREIGN KEY (exerciseID) REFERENCES Exercise(exerciseID) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+
+        DELETE FROM PersonalRecord;
+        INSERT INTO PersonalRecord (userID, exerciseID, maxWeight, best1RM, workoutID)
+        {personal_records_select()};
+
+        CREATE TRIGGER IF NOT EXISTS trg_personal_record_insert
+        AFTER INSERT ON Weightlift
+        BEGIN
+            {_personal_record_add("NEW")}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_personal_record_delete
+        AFTER DELETE ON Weightlift
+        WHEN OLD.weight IS NOT NULL
+        BEGIN
+            {_personal_record_recompute("OLD")}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_personal_record_update
+        AFTER UPDATE OF workoutID, exerciseID, reps, weight ON Weightlift
+        BEGIN
+            {_personal_record_recompute("OLD")}
+            {_personal_record_add("NEW")}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_personal_record_workout_delete
+        BEFORE DELETE ON Workout
+        BEGIN
+            DELETE FROM Weightlift WHERE workoutID = OLD.workoutID;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_personal_record_workout_user
+        AFTER UPDATE OF userID ON Workout
+        BEGIN
+            DELETE FROM PersonalRecord
+            WHERE userID IN (OLD.userID, NEW.userID)
+              AND exerciseID IN (SELECT exerciseID FROM Weightlift WHERE workoutID = NEW.workoutID);
+            INSERT INTO PersonalRecord (userID, exerciseID, maxWeight, best1RM, workoutID)
+            {personal_records_select(
+                "w.userID IN (OLD.userID, NEW.userID) AND wl.exerciseID IN "
+                "(SELECT exerciseID FROM Weightlift WHERE workoutID = NEW.workoutID)")};
+        END;
+    ''')
+
+
+# table -> (SQL for the userID a changed row belongs to, columns whose
+# updates can change a goal's progress or None for any column)
+GOAL_PROGRESS_INPUTS = {
+    "Goals": ("{row}.userID", None),
+    "Workout": ("{row}.userID", "userID, startTime, endTime, workoutType"),
+    "Run": ("(SELECT userID FROM Workout WHERE workoutID = {row}.workoutID)",
+            "workoutID, distance"),
+    "PersonalRecord": ("{row}.userID", None),
+}
+
+
+def _goal_progress_mark(user):
+    """Trigger SQL queueing a user's goals for re-evaluation.
+
+    An upsert rather than INSERT OR IGNORE: these triggers can fire from the
+    DO UPDATE of another trigger's upsert, whose ABORT conflict handling
+    would override OR IGNORE.
+    """
+    return f'''
+            INSERT INTO GoalProgressDirty (userID)
+            SELECT {user} WHERE EXISTS (SELECT 1 FROM Goals WHERE userID = {user})
+            ON CONFLICT (userID) DO NOTHING;'''
+
+
+def create_goal_progress(cursor):
+    """Create the GoalProgress table and the queue that keeps it current.
+
+    GoalProgress holds each goal's current value and percentage, computed by
+    models.goals.evaluate_goals. Triggers on the tables goals are measured
+    against queue the affected user in GoalProgressDirty. Every user with
+    goals starts out queued.
+    """
+    execute_script(cursor, '''
+        CREATE TABLE IF NOT EXISTS GoalProgress (
+          userID INT NOT NULL,
+          goalName VARCHAR(32) NOT NULL,
+          value FLOAT NOT NULL,
+          percent FLOAT NOT NULL,
+          PRIMARY KEY (userID, goalName),
+          FOREIGN KEY (userID, goalName) REFERENCES Goals(userID, goalName)
+            ON DELETE CASCADE ON UPDATE CASCADE
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS GoalProgressDirty (
+          userID INTEGER PRIMARY KEY
+        );
+
+        INSERT OR IGNORE INTO GoalProgressDirty (userID)
+        SELECT DISTINCT userID FROM Goals;
+    ''')
+    for table, (user, columns) in GOAL_PROGRESS_INPUTS.items():
+        update_of = f"UPDATE OF {columns}" if columns else "UPDATE"
+        execute_script(cursor, f'''
+            CREATE TRIGGER IF NOT EXISTS trg_goal_progress_{table.lower()}_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                {_goal_progress_mark(user.format(row="NEW"))}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_goal_progress_{table.lower()}_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                {_goal_progress_mark(user.format(row="OLD"))}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_goal_progress_{table.lower()}_update
+            AFTER {update_of} ON {table}
+            BEGIN
+                {_goal_progress_mark(user.format(row="OLD"))}
+                {_goal_progress_mark(user.format(row="NEW"))}
+            END;
+        ''')
+
+
+def _user_activity_recompute(user, day):
+    """Trigger SQL rebuilding one user's UserDailyActivity row for a day"""
+    return f'''
+            DELETE FROM UserDailyActivity WHERE userID = {user} AND day = {day};
+            INSERT INTO UserDailyActivity (userID, day, workoutMinutes, runKm, liftVolume)
+            SELECT {user}, {day}, TOTAL(w.durationMinutes),
+                   TOTAL((SELECT TOTAL(r.distance) FROM Run r
+                          WHERE r.workoutID = w.workoutID)),
+                   TOTAL((SELECT TOTAL(wl.weight * wl.reps) FROM Weightlift wl
+                          WHERE wl.workoutID = w.workoutID))
+            FROM Workout w
+            WHERE w.userID = {user}
+              AND w.startTime >= {day} * 86400 AND w.startTime < ({day} + 1) * 86400
+            HAVING COUNT(*) > 0;'''
+
+
+def create_user_daily_activity(cursor):
+    """Per-user daily workout minutes, run distance and lifted volume.
+
+    The comparison leaderboards rank users over windows of days, so they
+    sum these rows instead of joining Workout with Run and Weightlift.
+    Triggers re-aggregate the one (userID, day) row a change touches; a set
+    or interval whose workout was already deleted is covered by the
+    workout's own trigger.
+    """
+    execute_script(cursor, '''
+        CREATE TABLE IF NOT EXISTS UserDailyActivity (
+          userID INT NOT NULL,
+          day INT NOT NULL,
+          workoutMinutes FLOAT NOT NULL,
+          runKm FLOAT NOT NULL,
+          liftVolume FLOAT NOT NULL,
+          PRIMARY KEY (userID, day),
+          FOREIGN KEY (userID) REFERENCES Users(userID) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+
+        DELETE FROM UserDailyActivity;
+        INSERT INTO UserDailyActivity (userID, day, workoutMinutes, runKm, liftVolume)
+        SELECT w.userID, w.startTime / 86400, TOTAL(w.durationMinutes),
+               TOTAL((SELECT TOTAL(r.distance) FROM Run r
+                      WHERE r.workoutID = w.workoutID)),
+               TOTAL((SELECT TOTAL(wl.weight * wl.reps) FROM Weightlift wl
+                      WHERE wl.workoutID = w.workoutID))
+        FROM Workout w
+        GROUP BY w.userID, w.startTime / 86400;
+    ''')
+
+    workout_row = "{row}.userID", "{row}.startTime / 86400"
+    child_row = ("(SELECT userID FROM Workout WHERE workoutID = {row}.workoutID)",
+                 "(SELECT startTime / 86400 FROM Workout WHERE workoutID = {row}.workoutID)")
+    for table, (user, day) in (("Workout", workout_row), ("Run", child_row),
+                               ("Weightlift", child_row)):
+        old = _user_activity_recompute(user.format(row="OLD"), day.format(row="OLD"))
+        new = _user_activity_recompute(user.format(row="NEW"), day.format(row="NEW"))
+        execute_script(cursor, f'''
+            CREATE TRIGGER IF NOT EXISTS trg_user_activity_{table.lower()}_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                {new}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_user_activity_{table.lower()}_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                {old}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_user_activity_{table.lower()}_update
+            AFTER UPDATE ON {table}
+            BEGIN
+                {old}
+                {new}
+            END;
+        ''')
+
+
+def create_health_date_index(cursor):
+    """Index Health by date for record searches that span all users"""
+    execute_script(cursor, '''
+        -- search_health_records without a user, newest first
+        CREATE INDEX IF NOT EXISTS idx_health_date
+            ON Health (date);
+    ''')
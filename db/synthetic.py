@@ -0,0 +1,245 @@
+"""Seeded synthetic data for scaling experiments.
+
+Fills a scratch database with users and their health records, workouts,
+run intervals, weightlift sets and goals. The same seed and scale always
+produce the same rows. Rows are inserted in batches into the version 1
+schema, before the migrations create any indexes or triggers. Migrating
+afterwards builds every summary table set-based, the same way an existing
+database is upgraded.
+
+The 10m scale is a 7.5 GB file and takes about 16 minutes to generate on
+one core. Its TrainingLoad rows are not built until the first refresh:
+every user has a row per day from their first workout to today, about
+500M rows. A full refresh_training_load() then runs for about an hour
+and writes a 15 GB WAL; its memory stays under 500 MB because users are
+processed in batches.
+
+Run with: python -m db.synthetic OUT_FILE [--scale 1k|100k|10m] [--seed N]
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from config import db_config
+from .coherence import close_watchers
+from .migrations import MIGRATIONS, migrate
+
+# Scale name -> number of Workout rows; the other tables grow with it
+SCALES = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+
+WORKOUTS_PER_USER = 20
+HEALTH_DAYS_PER_USER = 20
+
+# Users are generated and inserted this many at a time
+CHUNK_USERS = 5_000
+
+# Workouts fall in the year before this date (epoch seconds, 2025-01-01)
+END_TIME = 1_735_689_600
+SPAN_DAYS = 365
+
+FIRST_NAMES = ["Anna", "Ben", "Chloe", "David", "Emma", "Felix", "Greta",
+               "Hugo", "Ida", "Jonas", "Kari", "Lars", "Maja", "Nils",
+               "Olivia", "Per", "Sofie", "Tor", "Ulla", "Viktor"]
+LAST_NAMES = ["Berg", "Dahl", "Eriksen", "Hansen", "Johansen", "Larsen",
+              "Moen", "Nilsen", "Olsen", "Pedersen", "Solberg", "Strand"]
+EXERCISES = [("Bench Press", "Chest"), ("Squat", "Legs"),
+             ("Deadlift", "Back"), ("Shoulder Press", "Shoulders"),
+             ("Bicep Curl", "Arms"), ("Barbell Row", "Back"),
+             ("Lunge", "Legs"), ("Plank", "Core")]
+GOALS = [("Run Distance", "km", 50, 500), ("Exercise Time", "min", 600, 6000),
+         ("Lift Weights", "kg", 60, 200), ("Weight Loss", "kg", 2, 15),
+         ("Daily Steps", "steps", 8000, 15000)]
+
+
+def _datetimes(seconds):
+    """Format epoch seconds as the DATETIME text of the version 1 schema"""
+    text = np.datetime_as_string(seconds.astype("datetime64[s]"), unit="s")
+    return np.char.replace(text, "T", " ")
+
+
+def _paces(seconds):
+    """Format seconds per km as the "mm:ss" text of the version 1 schema"""
+    minutes = np.char.zfill((seconds // 60).astype(str), 2)
+    return np.char.add(np.char.add(minutes, ":"),
+                       np.char.zfill((seconds % 60).astype(str), 2))
+
+
+def _rows(*columns):
+    """Zip NumPy columns into tuples of Python values for executemany"""
+    return list(zip(*(column.tolist() for column in columns)))
+
+
+def _generate_chunk(rng, first_user, users, first_workout):
+    """Rows for users first_user .. first_user + users - 1, per table"""
+    user_ids = np.arange(first_user, first_user + users)
+    tables = {}
+
+    sex = rng.choice(np.array(["M", "F"]), users)
+    dob = (np.datetime64("1950-01-01")
+           + rng.integers(0, 55 * 365, users)).astype(str)
+    tables["Users"] = _rows(
+        user_ids,
+        rng.choice(np.array(FIRST_NAMES), users),
+        rng.choice(np.array(LAST_NAMES), users),
+        np.round(np.where(sex == "M", rng.normal(82, 11, users),
+                          rng.normal(67, 9, users)).clip(40, 180), 1),
+        dob, sex)
+
+    # Health: distinct days per user, VO2max drifting over the year
+    days = rng.integers(0, SPAN_DAYS, (users, HEALTH_DAYS_PER_USER))
+    days.sort(axis=1)
+    keep = np.ones_like(days, dtype=bool)
+    keep[:, 1:] = days[:, 1:] != days[:, :-1]
+    health_users = np.repeat(user_ids, HEALTH_DAYS_PER_USER)[keep.ravel()]
+    health_days = days[keep]
+    count = len(health_days)
+    base_vo2 = rng.normal(45, 6, users)
+    trend = rng.normal(0, 2, users)
+    user_index = health_users - first_user
+    tables["Health"] = _rows(
+        health_users,
+        (np.datetime64(END_TIME - SPAN_DAYS * 86400, "s").astype("datetime64[D]")
+         + health_days).astype(str),
+        np.round(rng.normal(62, 7, count).clip(40, 100)),
+        np.round((base_vo2[user_index] + trend[user_index] * health_days / SPAN_DAYS
+                  + rng.normal(0, 1, count)).clip(20, 80), 1),
+        rng.integers(20, 110, count),
+        np.round(rng.normal(7.3, 0.8, count).clip(3, 11), 1))
+
+    # Workouts
+    per_user = rng.poisson(WORKOUTS_PER_USER, users)
+    workout_users = np.repeat(user_ids, per_user)
+    workouts = len(workout_users)
+    workout_ids = np.arange(first_workout, first_workout + workouts)
+    start = (END_TIME - rng.integers(1, SPAN_DAYS * 86400, workouts))
+    start -= start % 60
+    duration = rng.integers(20, 91, workouts) * 60
+    is_run = rng.random(workouts) < 0.55
+    tables["Workout"] = _rows(
+        workout_ids, workout_users, _datetimes(start),
+        _datetimes(start + duration), rng.integers(120, 196, workouts),
+        np.where(is_run, "Run", "Weightlift"))
+
+    # Run intervals, numbered 1..n within each run
+    run_ids = workout_ids[is_run]
+    intervals = rng.integers(1, 6, len(run_ids))
+    interval_workouts = np.repeat(run_ids, intervals)
+    interval_nr = (np.arange(len(interval_workouts))
+                   - np.repeat(np.cumsum(intervals) - intervals, intervals) + 1)
+    count = len(interval_workouts)
+    tables["Run"] = _rows(
+        interval_workouts, interval_nr,
+        np.round(rng.uniform(0.5, 5, count), 2),
+        _paces(rng.integers(230, 480, count)),
+        rng.integers(0, 11, count) / 2)
+
+    # Weightlift: two to four exercises per workout, three sets each
+    lift_ids = workout_ids[~is_run]
+    exercises = rng.integers(2, 5, len(lift_ids))
+    exercise_workouts = np.repeat(lift_ids, exercises)
+    exercise_ids = rng.integers(1, len(EXERCISES) + 1, len(exercise_workouts))
+    # Drop repeated exercises within a workout so (workoutID, exerciseID, setNr) is unique
+    _, unique = np.unique(exercise_workouts * 100 + exercise_ids, return_index=True)
+    exercise_workouts = exercise_workouts[unique]
+    exercise_ids = exercise_ids[unique]
+    set_workouts = np.repeat(exercise_workouts, 3)
+    count = len(set_workouts)
+    tables["Weightlift"] = _rows(
+        set_workouts, np.repeat(exercise_ids, 3),
+        np.tile(np.arange(1, 4), len(exercise_workouts)),
+        rng.integers(3, 13, count),
+        rng.integers(8, 57, count) * 2.5)
+
+    # Goals: up to three distinct goals per user
+    goal_index = rng.random((users, len(GOALS))).argsort(axis=1)[:, :3]
+    taken = rng.random((users, 3)) < 0.6
+    goal_users = np.repeat(user_ids, 3)[taken.ravel()]
+    goal_index = goal_index[taken]
+    low = np.array([g[2] for g in GOALS])[goal_index]
+    high = np.array([g[3] for g in GOALS])[goal_index]
+    tables["Goals"] = _rows(
+        goal_users,
+        np.array([g[0] for g in GOALS])[goal_index],
+        np.round(rng.uniform(low, high), 0),
+        np.array([g[1] for g in GOALS])[goal_index],
+        (rng.random(len(goal_users)) < 0.2).astype(int))
+    return tables, workouts
+
+
+INSERTS = {
+    "Users": "INSERT INTO Users (userID, fName, lName, weight, DOB, sex) VALUES (?, ?, ?, ?, ?, ?)",
+    "Health": "INSERT INTO Health (userID, date, heartrate, VO2max, HRvariation, sleeptime) VALUES (?, ?, ?, ?, ?, ?)",
+    "Workout": "INSERT INTO Workout (workoutID, userID, startTime, endTime, maxHR, workoutType) VALUES (?, ?, ?, ?, ?, ?)",
+    "Run": "INSERT INTO Run (workoutID, intervalNr, distance, pace, incline) VALUES (?, ?, ?, ?, ?)",
+    "Weightlift": "INSERT INTO Weightlift (workoutID, exerciseID, setNr, reps, weight) VALUES (?, ?, ?, ?, ?)",
+    "Goals": "INSERT INTO Goals (userID, goalName, amount, metric, completed) VALUES (?, ?, ?, ?, ?)",
+}
+
+
+def generate(path, scale="1k", seed=0):
+    """Create a scratch database at path filled with synthetic data.
+
+    Refuses to overwrite an existing file. Returns the row count of each
+    table and the seconds taken.
+    """
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists")
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    users = max(1, SCALES[scale] // WORKOUTS_PER_USER)
+
+    conn = sqlite3.connect(path)
+    try:
+        # Load into the original schema: no secondary indexes or triggers yet
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        cursor = conn.cursor()
+        version, create_tables = MIGRATIONS[0]
+        create_tables(cursor)
+        cursor.execute(f"PRAGMA user_version = {int(version)}")
+        cursor.executemany("INSERT INTO Exercise (name, muscleGroup) VALUES (?, ?)",
+                           EXERCISES)
+        conn.commit()
+
+        counts = dict.fromkeys(INSERTS, 0)
+        next_workout = 1
+        for first_user in range(1, users + 1, CHUNK_USERS):
+            chunk = min(CHUNK_USERS, users + 1 - first_user)
+            tables, workouts = _generate_chunk(rng, first_user, chunk, next_workout)
+            next_workout += workouts
+            for table, rows in tables.items():
+                cursor.executemany(INSERTS[table], rows)
+                counts[table] += len(rows)
+            conn.commit()
+
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("PRAGMA synchronous = FULL")
+        # migrate() drops the cached reads of the configured database
+        original = db_config.DATABASE_FILE
+        db_config.DATABASE_FILE = path
+        try:
+            migrate(conn)
+        finally:
+            db_config.DATABASE_FILE = original
+            close_watchers()
+    finally:
+        conn.close()
+    return {"counts": counts, "seconds": time.perf_counter() - started}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic fitness database")
+    parser.add_argument("file", help="Database file to create")
+    parser.add_argument("--scale", choices=SCALES, default="1k")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        report = generate(args.file, args.scale, args.seed)
+    except FileExistsError as e:
+        raise SystemExit(f"Not overwriting: {e}")
+    rows = ", ".join(f"{table} {count}" for table, count in report["counts"].items())
+    print(f"Generated {args.file} in {report['seconds']:.1f}s: {rows}")
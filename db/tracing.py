@@ -0,0 +1,272 @@
+import bisect
+import functools
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from config import db_config
+
+# Opt-in statement tracing. While enabled, pooled connections hand out
+# TracedCursor objects that time each statement from execute() until its
+# rows are fetched, and a trace callback counts the trigger statements it
+# fires. Finished statements are aggregated per normalized SQL text into a
+# latency histogram; those slower than SLOW_QUERY_MS also go to a bounded
+# slow-query log together with their EXPLAIN QUERY PLAN.
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open
+HISTOGRAM_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250,
+                        500, 1000, 2500)
+
+_enabled = db_config.QUERY_TRACING
+_lock = threading.Lock()
+_local = threading.local()
+_statements = {}
+_slow_queries = deque(maxlen=db_config.SLOW_QUERY_LOG_SIZE)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \(\?(?:, \?)+\)", re.IGNORECASE)
+
+
+def enable_tracing():
+    """Start tracing statements on connections checked out from now on"""
+    global _enabled
+    _enabled = True
+
+
+def disable_tracing():
+    """Stop tracing; statistics gathered so far are kept"""
+    global _enabled
+    _enabled = False
+
+
+def tracing_enabled():
+    return _enabled
+
+
+def reset_query_stats():
+    """Forget all statement statistics and the slow-query log"""
+    with _lock:
+        _statements.clear()
+        _slow_queries.clear()
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    """Statement text with literals replaced by ? and whitespace collapsed"""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = " ".join(sql.split())
+    sql = sql.replace("( ", "(").replace(" )", ")").replace(" ,", ",")
+    return _IN_LIST.sub("IN (?, ...)", sql)
+
+
+def _caller():
+    """Name of the model function that issued the statement.
+
+    Falls back to the first frame outside the db package and pandas, e.g.
+    a page component querying directly.
+    """
+    fallback = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("models."):
+            return f"{module}.{frame.f_code.co_name}"
+        if fallback is None and not module.startswith(("db.", "pandas", "sqlite3")):
+            fallback = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback
+
+
+def on_statement(sql):
+    """Trace callback: count statement starts within the current execute.
+
+    SQLite reports every trigger program and every statement inside it as
+    another start of the outer statement, so starts beyond the statement's
+    own runs are work done by triggers.
+    """
+    record = getattr(_local, "current", None)
+    if record is not None:
+        record["starts"] += 1
+
+
+def _explain(conn, sql, parameters):
+    """EXPLAIN QUERY PLAN of a statement, one step per line, indented by depth"""
+    try:
+        cursor = conn.cursor(sqlite3.Cursor)
+        rows = cursor.execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+        depth = {0: -1}
+        lines = []
+        for step, parent, _, detail in rows:
+            depth[step] = depth.get(parent, -1) + 1
+            lines.append("  " * depth[step] + detail)
+        return "\n".join(lines)
+    except sqlite3.Error as e:
+        return f"(not explained: {e})"
+
+
+def _record(conn, record):
+    """Add a finished statement to the statistics"""
+    seconds = record["seconds"]
+    normalized = normalize_sql(record["sql"])
+    bucket = bisect.bisect_left(HISTOGRAM_BUCKETS_MS, seconds * 1000)
+    with _lock:
+        stats = _statements.get(normalized)
+        if stats is None:
+            stats = _statements[normalized] = {
+                "calls": 0, "seconds": 0.0, "max_seconds": 0.0, "rows": 0,
+                "trigger_statements": 0, "callers": set(),
+                "histogram": [0] * (len(HISTOGRAM_BUCKETS_MS) + 1),
+            }
+        stats["calls"] += 1
+        stats["seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        stats["rows"] += record["rows"]
+        stats["trigger_statements"] += record["triggers"]
+        if record["caller"]:
+            stats["callers"].add(record["caller"])
+        stats["histogram"][bucket] += 1
+    if seconds * 1000 >= db_config.SLOW_QUERY_MS:
+        entry = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "sql": normalized,
+            "caller": record["caller"],
+            "ms": seconds * 1000,
+            "rows": record["rows"],
+            "trigger_statements": record["triggers"],
+            "plan": _explain(conn, record["sql"], record["parameters"]),
+        }
+        with _lock:
+            _slow_queries.append(entry)
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that times its statements and counts the rows they return"""
+
+    _record = None
+
+    def _finish(self):
+        record, self._record = self._record, None
+        if record is not None:
+            _record(self.connection, record)
+
+    def _run(self, method, sql, parameters, runs, explain_parameters):
+        self._finish()
+        record = {"sql": sql, "parameters": explain_parameters,
+                  "caller": _caller(), "rows": 0, "starts": 0}
+        _local.current = record
+        started = time.perf_counter()
+        try:
+            method(sql, parameters)
+        finally:
+            record["seconds"] = time.perf_counter() - started
+            _local.current = None
+        record["triggers"] = max(record["starts"] - runs, 0)
+        self._record = record
+        if self.description is None:
+            # Not a query: nothing to fetch, so the statement is done
+            record["rows"] = max(self.rowcount, 0)
+            self._finish()
+        else:
+            self.connection._traced_cursors.append(self)
+        return self
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters, 1, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        # Materialized so the runs can be counted and the first set explained
+        seq_of_parameters = list(seq_of_parameters)
+        first = seq_of_parameters[0] if seq_of_parameters else None
+        return self._run(super().executemany, sql, seq_of_parameters,
+                         len(seq_of_parameters), first)
+
+    def _fetch(self, method, *args):
+        record = self._record
+        started = time.perf_counter()
+        rows = method(*args)
+        if record is not None:
+            record["seconds"] += time.perf_counter() - started
+            if isinstance(rows, list):
+                record["rows"] += len(rows)
+                if not rows or (args and len(rows) < args[0]):
+                    self._finish()
+            elif rows is None:
+                self._finish()
+            else:
+                record["rows"] += 1
+        return rows
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, size or self.arraysize)
+
+    def fetchall(self):
+        rows = self._fetch(super().fetchall)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+def finish_statements(conn):
+    """Record the statements still open on a connection's traced cursors"""
+    cursors, conn._traced_cursors = conn._traced_cursors, []
+    for cursor in cursors:
+        cursor._finish()
+
+
+def _percentile(histogram, fraction):
+    """Upper bound (ms) of the bucket holding the given fraction of calls"""
+    target = fraction * sum(histogram)
+    seen = 0
+    for bound, count in zip(HISTOGRAM_BUCKETS_MS + (float("inf"),), histogram):
+        seen += count
+        if seen >= target:
+            return bound
+    return float("inf")
+
+
+def get_query_stats():
+    """Per-statement call counts, latencies and histograms, slowest total first"""
+    with _lock:
+        snapshot = [(sql, dict(stats, callers=sorted(stats["callers"]),
+                               histogram=list(stats["histogram"])))
+                    for sql, stats in _statements.items()]
+    rows = []
+    for sql, stats in snapshot:
+        rows.append({
+            "sql": sql,
+            "callers": ", ".join(stats["callers"]),
+            "calls": stats["calls"],
+            "total_ms": stats["seconds"] * 1000,
+            "mean_ms": stats["seconds"] * 1000 / stats["calls"],
+            "p50_ms": _percentile(stats["histogram"], 0.5),
+            "p95_ms": _percentile(stats["histogram"], 0.95),
+            "max_ms": stats["max_seconds"] * 1000,
+            "rows": stats["rows"],
+            "trigger_statements": stats["trigger_statements"],
+            "histogram": stats["histogram"],
+        })
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    return rows
+
+
+def get_slow_queries():
+    """Slow-query log entries, newest first"""
+    with _lock:
+        return list(reversed(_slow_queries))
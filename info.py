@@ -1,5 +1,6 @@
 import streamlit as st
 from db import init_db
+from models.analytics import get_table_counts
 
 init_db()
 
@@ -21,24 +22,11 @@ Benjamin, Johan, Jonas, Sofiya and Torbjørn
 st.subheader("Database content simplified")
 
 with st.expander("View Database Statistics"):
-    import sqlite3
-
-    conn = sqlite3.connect('fitness_tracker.db')
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT COUNT(*) FROM Users")
-    user_count = cursor.fetchone()[0]
-
-    cursor.execute("SELECT COUNT(*) FROM Health")
-    health_count = cursor.fetchone()[0]
-
-    cursor.execute("SELECT COUNT(*) FROM Workout")
-    workout_count = cursor.fetchone()[0]
-
-    cursor.execute("SELECT COUNT(*) FROM Goals")
-    goal_count = cursor.fetchone()[0]
-
-    conn.close()
+    counts = get_table_counts()
+    user_count = counts.get("Users", 0)
+    health_count = counts.get("Health", 0)
+    workout_count = counts.get("Workout", 0)
+    goal_count = counts.get("Goals", 0)
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Users", user_count)
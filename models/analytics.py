@@ -0,0 +1,86 @@
+import pandas as pd
+from db.connection import get_db_connection
+from db.cache import cached_read
+from db.queue import drain_queue
+
+# Recomputes ExerciseStats rows for the exercises listed in {source}
+_EXERCISE_STATS_SQL = """
+INSERT OR REPLACE INTO ExerciseStats (
+    exerciseID, times_performed, users_performed,
+    weight_sum, weight_count, reps_sum, reps_count, related_goals_completed)
+SELECT
+    e.exerciseID,
+    COUNT(DISTINCT wl.workoutID),
+    COUNT(DISTINCT w.userID),
+    TOTAL(wl.weight),
+    COUNT(wl.weight),
+    TOTAL(wl.reps),
+    COUNT(wl.reps),
+    (SELECT COUNT(*) FROM Goals g
+     WHERE g.goalName = 'Lift Weights' AND g.completed = 1
+       AND g.userID IN (
+           SELECT w2.userID FROM Weightlift wl2
+           JOIN Workout w2 ON w2.workoutID = wl2.workoutID
+           WHERE wl2.exerciseID = e.exerciseID))
+FROM
+    {source}
+LEFT JOIN
+    Weightlift wl ON wl.exerciseID = e.exerciseID
+LEFT JOIN
+    Workout w ON w.workoutID = wl.workoutID
+GROUP BY
+    e.exerciseID
+"""
+
+
+def refresh(full=False):
+    """Bring ExerciseStats up to date.
+
+    By default only exercises whose sets, workouts or 'Lift Weights' goals
+    changed since the last refresh are recomputed; full=True rebuilds the
+    whole table.
+    """
+    def recompute(conn):
+        cursor = conn.cursor()
+        if full:
+            cursor.execute("DELETE FROM ExerciseStats")
+            source = "Exercise e"
+        else:
+            source = ("ExerciseStatsDirty d "
+                      "JOIN Exercise e ON e.exerciseID = d.exerciseID")
+        cursor.execute(_EXERCISE_STATS_SQL.format(source=source))
+        refreshed = cursor.rowcount
+        cursor.execute("DELETE FROM ExerciseStatsDirty")
+        return {"refreshed": refreshed}
+
+    return drain_queue("ExerciseStatsDirty", recompute, full, {"refreshed": 0})
+
+
+@cached_read
+def get_exercise_effectiveness():
+    """Get per-exercise effectiveness as of the last refresh()"""
+    conn = get_db_connection()
+    df = pd.read_sql("SELECT * FROM ExerciseEffectivenessAnalysis ORDER BY exercise_name",
+                     conn)
+    conn.close()
+    return df
+
+
+@cached_read
+def get_user_progress_overview():
+    """Get per-user workout, health and goal totals"""
+    conn = get_db_connection()
+    df = pd.read_sql("SELECT * FROM UserProgressOverview ORDER BY userID", conn)
+    conn.close()
+    return df
+
+
+@cached_read
+def get_table_counts():
+    """Get the row counts of Users, Health, Workout and Goals"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT tableName, rowCount FROM TableRowCounts")
+    counts = {row[0]: row[1] for row in cursor.fetchall()}
+    conn.close()
+    return counts
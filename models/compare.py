@@ -0,0 +1,122 @@
+from datetime import date
+import pandas as pd
+from db.connection import get_db_connection
+from db.cache import cached_read
+
+# metric -> (label, SQL giving each user's value over the window). Activity
+# metrics sum UserDailyActivity between :start_day and :end_day (days since
+# the epoch). The VO2max trend is the slope of a least-squares line through
+# the user's weekly HealthRollup averages, in VO2max per week.
+LEADERBOARD_METRICS = {
+    "workout_minutes": ("Workout minutes", """
+        SELECT userID, TOTAL(workoutMinutes) AS value
+        FROM UserDailyActivity
+        WHERE day BETWEEN :start_day AND :end_day
+        GROUP BY userID
+        HAVING value > 0
+    """),
+    "weekly_run_km": ("Weekly run distance (km)", """
+        SELECT userID,
+               TOTAL(runKm) * 7.0
+               / COALESCE(:window_days, MAX(day) - MIN(day) + 1) AS value
+        FROM UserDailyActivity
+        WHERE day BETWEEN :start_day AND :end_day
+        GROUP BY userID
+        HAVING value > 0
+    """),
+    "vo2max_trend": ("VO2max trend (per week)", """
+        SELECT userID,
+               (COUNT(*) * SUM(x * y) - SUM(x) * SUM(y))
+               / NULLIF(COUNT(*) * SUM(x * x) - SUM(x) * SUM(x), 0) AS value
+        FROM (
+            SELECT userID, VO2max_avg AS y,
+                   (julianday(periodStart) - 2440587.5 - :start_day) / 7.0 AS x
+            FROM HealthRollup
+            WHERE period = 'week' AND VO2max_avg IS NOT NULL
+              AND periodStart BETWEEN date(:start_day * 86400, 'unixepoch')
+                                  AND date(:end_day * 86400, 'unixepoch'))
+        GROUP BY userID
+        HAVING COUNT(*) >= 2
+    """),
+    "lifted_volume": ("Lifted volume (kg)", """
+        SELECT userID, TOTAL(liftVolume) AS value
+        FROM UserDailyActivity
+        WHERE day BETWEEN :start_day AND :end_day
+        GROUP BY userID
+        HAVING value > 0
+    """),
+}
+
+_RANKING_SQL = """
+SELECT r.userID, u.fName || ' ' || u.lName AS userName, r.value,
+       RANK() OVER (ORDER BY r.value DESC) AS rank,
+       COUNT(*) OVER () AS ranked
+FROM ({metric}) r
+JOIN Users u ON u.userID = r.userID
+WHERE r.value IS NOT NULL
+ORDER BY rank, r.userID
+"""
+
+
+def _window_days(window_days, end_date):
+    """(start_day, end_day) in days since the epoch; None means all time"""
+    end_day = ((end_date or date.today()) - date(1970, 1, 1)).days
+    start_day = 0 if window_days is None else end_day - window_days + 1
+    return start_day, end_day
+
+
+@cached_read
+def _get_rankings(metric, window_days, end_date):
+    """Rank every user with data on one metric over a window"""
+    conn = get_db_connection()
+    start_day, end_day = _window_days(window_days, end_date)
+    try:
+        df = pd.read_sql(
+            _RANKING_SQL.format(metric=LEADERBOARD_METRICS[metric][1]), conn,
+            params={"start_day": start_day, "end_day": end_day,
+                    "window_days": window_days})
+        result = {"success": True, "data": df}
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    finally:
+        conn.close()
+    return result
+
+
+def get_rankings(metric, window_days=None, end_date=None):
+    """Rank users on a metric over the window_days days up to end_date.
+
+    The full ranking is computed once per (metric, window, end date) and
+    served from the read cache until the next write, so leaderboards and
+    pairwise comparisons only slice it. end_date defaults to today and
+    window_days=None covers all time.
+    """
+    return _get_rankings(metric, window_days, end_date or date.today())
+
+
+def get_leaderboard(metric, window_days=None, top_n=10, end_date=None):
+    """Get the top_n users on a metric over a window"""
+    result = get_rankings(metric, window_days, end_date)
+    if result["success"]:
+        result["data"] = result["data"].head(top_n)
+    return result
+
+
+def compare_users(user_a, user_b, window_days=None, end_date=None):
+    """Side-by-side value and rank of two users on every metric.
+
+    A user with no data for a metric in the window has no value or rank.
+    """
+    rows = []
+    for metric, (label, _) in LEADERBOARD_METRICS.items():
+        result = get_rankings(metric, window_days, end_date)
+        if not result["success"]:
+            return result
+        ranked = result["data"].set_index("userID")
+        row = {"metric": label, "ranked": len(ranked)}
+        for key, user_id in (("a", user_a), ("b", user_b)):
+            found = user_id in ranked.index
+            row[f"value_{key}"] = ranked.at[user_id, "value"] if found else None
+            row[f"rank_{key}"] = ranked.at[user_id, "rank"] if found else None
+        rows.append(row)
+    return {"success": True, "data": pd.DataFrame(rows)}
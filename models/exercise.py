@@ -1,6 +1,8 @@
 import pandas as pd
 from db.connection import get_db_connection
+from db.cache import cached_read, invalidates_cache
 
+@cached_read
 def get_all_exercises():
     """Retrieve all exercises from the database"""
     conn = get_db_connection()
@@ -8,6 +10,7 @@ def get_all_exercises():
     conn.close()
     return df
 
+@invalidates_cache
 def add_exercise(name, muscle_group):
     """Add a new exercise to the database, format name (muscleGroup)"""
     conn = get_db_connection()
@@ -25,6 +28,7 @@ def add_exercise(name, muscle_group):
         conn.close()
     return result
 
+@invalidates_cache
 def update_exercise(exercise_id, name, muscle_group):
     """Update an existing exercise"""
     conn = get_db_connection()
@@ -42,6 +46,7 @@ def update_exercise(exercise_id, name, muscle_group):
         conn.close()
     return result
 
+@invalidates_cache
 def delete_exercise(exercise_id):
     """Delete an exercise from the database"""
     conn = get_db_connection()
@@ -62,6 +67,7 @@ def delete_exercise(exercise_id):
         conn.close()
     return result
 
+@cached_read
 def get_exercise_by_id(exercise_id):
     """Get an exercise by ID"""
     conn = get_db_connection()
@@ -0,0 +1,68 @@
+"""Streaming export of the database tables to CSV or JSON Lines.
+
+Tables are read in fixed-size chunks and each chunk is written before the
+next one is fetched, so memory use stays flat regardless of table size.
+
+Run with: python -m models.export OUT_DIR [--format csv|jsonl]
+"""
+import argparse
+import os
+import pandas as pd
+from db.connection import get_db_connection
+
+EXPORT_TABLES = ["Users", "Health", "Goals", "Workout", "Run", "Exercise",
+                 "Weightlift"]
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def stream_table(table, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield a table as DataFrames of at most chunk_size rows"""
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table: {table}")
+    conn = get_db_connection()
+    try:
+        for chunk in pd.read_sql(f"SELECT * FROM {table}", conn,
+                                 chunksize=chunk_size):
+            yield chunk
+    finally:
+        conn.close()
+
+
+def export_table(table, path, fmt="csv", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write one table to a CSV or JSON Lines file chunk by chunk"""
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Unknown export format: {fmt}")
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        for chunk in stream_table(table, chunk_size):
+            if fmt == "csv":
+                chunk.to_csv(f, index=False, header=rows == 0)
+            elif not chunk.empty:
+                lines = chunk.to_json(orient="records", lines=True)
+                f.write(lines if lines.endswith("\n") else lines + "\n")
+            rows += len(chunk)
+    return rows
+
+
+def export_all(out_dir, fmt="csv", tables=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Export tables into out_dir, one file per table; returns rows per table"""
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {}
+    for table in tables or EXPORT_TABLES:
+        path = os.path.join(out_dir, f"{table}.{fmt}")
+        counts[table] = export_table(table, path, fmt, chunk_size)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the fitness tracker database")
+    parser.add_argument("out_dir", help="directory to write one file per table to")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--tables", nargs="+", choices=EXPORT_TABLES)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    counts = export_all(args.out_dir, args.format, args.tables, args.chunk_size)
+    for table, rows in counts.items():
+        print(f"{table}: {rows} rows")
@@ -1,29 +1,120 @@
 import pandas as pd
 from db.connection import get_db_connection
+from db.cache import cached_read, invalidates_cache
+from db.queue import drain_queue
 
+# (goalName, metric) -> how progress is measured, in terms of the per-user
+# totals computed by evaluate_goals. A goalName of None matches any goal.
+GOAL_PROGRESS_METRICS = {
+    ("Run Distance", "km"): "run_km",
+    ("Run Distance", "mi"): "run_km / 1.609344",
+    ("Run Distance", "sessions"): "run_sessions",
+    ("Exercise Time", "min"): "minutes",
+    ("Exercise Time", "hrs"): "minutes / 60.0",
+    ("Lift Weights", "kg"): "lift_kg",
+    ("Lift Weights", "lbs"): "lift_kg * 2.20462262",
+    ("Lift Weights", "sessions"): "lift_sessions",
+    (None, "sessions"): "sessions",
+}
+
+_GOAL_PROGRESS_SQL = """
+WITH
+    totals AS (
+        SELECT q.userID,
+               (SELECT COUNT(*) FROM Workout w
+                WHERE w.userID = q.userID) AS sessions,
+               (SELECT TOTAL(w.workoutType = 'Run') FROM Workout w
+                WHERE w.userID = q.userID) AS run_sessions,
+               (SELECT TOTAL(w.workoutType = 'Weightlift') FROM Workout w
+                WHERE w.userID = q.userID) AS lift_sessions,
+               (SELECT TOTAL(w.durationMinutes) FROM Workout w
+                WHERE w.userID = q.userID) AS minutes,
+               (SELECT TOTAL(r.distance) FROM Workout w
+                JOIN Run r ON r.workoutID = w.workoutID
+                WHERE w.userID = q.userID) AS run_km,
+               (SELECT COALESCE(MAX(p.maxWeight), 0) FROM PersonalRecord p
+                WHERE p.userID = q.userID) AS lift_kg
+        FROM GoalProgressDirty q),
+    progress AS (
+        SELECT g.userID, g.goalName, g.amount, {value} AS value
+        FROM totals t JOIN Goals g ON g.userID = t.userID)
+INSERT INTO GoalProgress (userID, goalName, value, percent)
+SELECT userID, goalName, value,
+       COALESCE(MIN(100.0, 100.0 * value / NULLIF(amount, 0)), 100.0)
+FROM progress
+WHERE value IS NOT NULL
+"""
+
+
+def _goal_value_sql():
+    """CASE expression picking each goal's measure, with its parameters"""
+    cases, params = [], []
+    for (goal_name, metric), measure in GOAL_PROGRESS_METRICS.items():
+        if goal_name is None:
+            cases.append(f"WHEN g.metric = ? THEN {measure}")
+            params.append(metric)
+        else:
+            cases.append(f"WHEN g.goalName = ? AND g.metric = ? THEN {measure}")
+            params.extend((goal_name, metric))
+    return "CASE " + " ".join(cases) + " END", params
+
+
+def evaluate_goals(full=False):
+    """Bring GoalProgress up to date.
+
+    By default only the goals of users whose goals, workouts, runs or
+    personal records changed since the last pass are evaluated, all of them
+    in one statement; full=True re-evaluates every goal. Goals with no
+    measurable (goalName, metric) pair get no progress row.
+    """
+    def recompute(conn):
+        cursor = conn.cursor()
+        if full:
+            cursor.execute("INSERT OR IGNORE INTO GoalProgressDirty (userID) "
+                           "SELECT DISTINCT userID FROM Goals")
+        cursor.execute("DELETE FROM GoalProgress "
+                       "WHERE userID IN (SELECT userID FROM GoalProgressDirty)")
+        value, params = _goal_value_sql()
+        cursor.execute(_GOAL_PROGRESS_SQL.format(value=value), params)
+        # rowcount is -1 for a statement starting with WITH; changes()
+        # counts the rows it inserted, leaving out trigger writes
+        cursor.execute("SELECT changes()")
+        evaluated = cursor.fetchone()[0]
+        cursor.execute("DELETE FROM GoalProgressDirty")
+        return {"evaluated": evaluated}
+
+    return drain_queue("GoalProgressDirty", recompute, full, {"evaluated": 0})
+
+@cached_read
 def get_all_goals():
-    """Retrieve all goals"""
+    """Retrieve all goals with their evaluated progress, if measurable"""
     conn = get_db_connection()
     df = pd.read_sql("""
-    SELECT g.*, u.fName || ' ' || u.lName AS userName 
+    SELECT g.*, u.fName || ' ' || u.lName AS userName,
+           p.value AS progress, p.percent AS progressPercent
     FROM Goals g
     JOIN Users u ON g.userID = u.userID
+    LEFT JOIN GoalProgress p ON p.userID = g.userID AND p.goalName = g.goalName
     ORDER BY g.userID, g.goalName
     """, conn)
     conn.close()
     return df
 
+@cached_read
 def get_goals_by_user(user_id):
-    """Retrieve goals for a specific user"""
+    """Retrieve goals for a specific user with their evaluated progress"""
     conn = get_db_connection()
     df = pd.read_sql("""
-    SELECT * FROM Goals 
-    WHERE userID = ? 
-    ORDER BY goalName
+    SELECT g.*, p.value AS progress, p.percent AS progressPercent
+    FROM Goals g
+    LEFT JOIN GoalProgress p ON p.userID = g.userID AND p.goalName = g.goalName
+    WHERE g.userID = ?
+    ORDER BY g.goalName
     """, conn, params=(user_id,))
     conn.close()
     return df
 
+@invalidates_cache
 def add_goal(user_id, goal_name, amount, metric, completed=0):
     """Add a new goal"""
     conn = get_db_connection()
@@ -41,6 +132,7 @@ def add_goal(user_id, goal_name, amount, metric, completed=0):
         conn.close()
     return result
 
+@invalidates_cache
 def update_goal(user_id, goal_name, amount, metric, completed):
     """Update an existing goal"""
     conn = get_db_connection()
@@ -58,6 +150,7 @@ def update_goal(user_id, goal_name, amount, metric, completed):
         conn.close()
     return result
 
+@invalidates_cache
 def delete_goal(user_id, goal_name):
     """Delete a goal"""
     conn = get_db_connection()
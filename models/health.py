@@ -1,6 +1,9 @@
 import pandas as pd
 from db.connection import get_db_connection
+from db.cache import cached_read, invalidates_cache
+from db.schema import HEALTH_METRICS
 
+@cached_read
 def get_all_health_records():
     """Get all health records"""
     conn = get_db_connection()
@@ -8,6 +11,71 @@ def get_all_health_records():
     conn.close()
     return df
 
+@cached_read
+def get_health_records_page(cursor=None, page_size=50):
+    """Get one page of health records ordered by user and date.
+
+    cursor is the (userID, date) of the last row of the previous page, or
+    None for the first page. The result includes the cursor for the next
+    page, which is None on the last page.
+    """
+    conn = get_db_connection()
+    where = "WHERE (userID, date) > (?, ?)" if cursor else ""
+    params = tuple(cursor or ()) + (page_size + 1,)
+    try:
+        df = pd.read_sql(f"""
+        SELECT * FROM Health
+        {where}
+        ORDER BY userID, date
+        LIMIT ?
+        """, conn, params=params)
+        next_cursor = None
+        if len(df) > page_size:
+            df = df.iloc[:page_size]
+            last = df.iloc[-1]
+            next_cursor = (int(last["userID"]), last["date"])
+        result = {"success": True, "data": df, "next_cursor": next_cursor}
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    finally:
+        conn.close()
+    return result
+
+@cached_read
+def search_health_records(user_id=None, start_date=None, end_date=None, limit=50):
+    """Find at most limit health records matching the given filters, newest first.
+
+    Dates are inclusive "YYYY-MM-DD" strings or dates and None means no
+    filter. The result's "more" flag tells whether further matches exist.
+    """
+    conditions, params = [], []
+    if user_id is not None:
+        conditions.append("userID = ?")
+        params.append(user_id)
+    if start_date is not None:
+        conditions.append("date >= ?")
+        params.append(str(start_date))
+    if end_date is not None:
+        conditions.append("date <= ?")
+        params.append(str(end_date))
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+
+    conn = get_db_connection()
+    try:
+        df = pd.read_sql(f"""
+        SELECT userID, date FROM Health
+        {where}
+        ORDER BY date DESC
+        LIMIT ?
+        """, conn, params=params + [limit + 1])
+        result = {"success": True, "data": df.iloc[:limit], "more": len(df) > limit}
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    finally:
+        conn.close()
+    return result
+
+@cached_read
 def get_health_by_user(user_id):
     """Get health records for a specific user"""
     conn = get_db_connection()
@@ -16,6 +84,7 @@ def get_health_by_user(user_id):
     conn.close()
     return df
 
+@invalidates_cache
 def add_health_record(user_id, date, heartrate, vo2max, hr_variation, sleeptime):
     """Add a new health record"""
     conn = get_db_connection()
@@ -34,6 +103,7 @@ def add_health_record(user_id, date, heartrate, vo2max, hr_variation, sleeptime)
         conn.close()
     return result
 
+@invalidates_cache
 def update_health_record(user_id, date, heartrate, vo2max, hr_variation, sleeptime):
     """Update an existing health record"""
     conn = get_db_connection()
@@ -52,6 +122,7 @@ def update_health_record(user_id, date, heartrate, vo2max, hr_variation, sleepti
         conn.close()
     return result
 
+@invalidates_cache
 def delete_health_record(user_id, date):
     """Delete a health record"""
     conn = get_db_connection()
@@ -64,4 +135,55 @@ def delete_health_record(user_id, date):
         result = {"success": False, "error": str(e)}
     finally:
         conn.close()
-    return result
\ No newline at end of file
+    return result
+
+
+def _trend_granularity(start_date, end_date, max_points):
+    """Finest of day/week/month whose point count fits within max_points"""
+    days = (end_date - start_date).days + 1
+    if days <= max_points:
+        return "day"
+    if (days + 6) // 7 + 1 <= max_points:
+        return "week"
+    return "month"
+
+
+@cached_read
+def get_health_trend(user_id, start_date, end_date, max_points=120):
+    """Get a user's health metrics over a date range for charting.
+
+    Coarsens from daily Health rows to the weekly or monthly rollups only as
+    far as needed to return at most about max_points points. Every point
+    has <metric>_avg/_min/_max columns and the number of days it covers.
+    start_date and end_date are datetime.date objects.
+    """
+    granularity = _trend_granularity(start_date, end_date, max_points)
+    conn = get_db_connection()
+    try:
+        if granularity == "day":
+            columns = ", ".join(f"{m} AS {m}_avg, {m} AS {m}_min, {m} AS {m}_max"
+                                for m in HEALTH_METRICS)
+            df = pd.read_sql(f"""
+            SELECT date AS periodStart, 1 AS days, {columns}
+            FROM Health
+            WHERE userID = ? AND date BETWEEN ? AND ?
+            ORDER BY date
+            """, conn, params=(user_id, start_date.isoformat(), end_date.isoformat()))
+        else:
+            # Include the bucket that contains start_date
+            df = pd.read_sql("""
+            SELECT * FROM HealthRollup
+            WHERE userID = ? AND period = ?
+              AND periodStart BETWEEN date(?, ?) AND ?
+            ORDER BY periodStart
+            """, conn, params=(
+                user_id, granularity, start_date.isoformat(),
+                "-6 days" if granularity == "week" else "start of month",
+                end_date.isoformat()))
+            df = df.drop(columns=["userID", "period"])
+        result = {"success": True, "granularity": granularity, "data": df}
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    finally:
+        conn.close()
+    return result
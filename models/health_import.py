@@ -0,0 +1,179 @@
+"""Bulk import of daily health metrics from wearable CSV exports.
+
+The file is streamed row by row, validated, and upserted into Health in
+large executemany batches, one transaction per batch. Rows that already
+exist for a (userID, date) are overwritten. The per-row HealthRollup
+triggers are dropped for the batch and the touched week and month buckets
+rebuilt once at its end, instead of twice per row.
+
+Run with: python -m models.health_import FILE [--batch-size N]
+"""
+import argparse
+import csv
+import io
+import time
+from datetime import date
+from db.connection import get_db_connection
+from db.cache import invalidates_cache
+from db.schema import create_health_rollup_triggers, drop_health_rollup_triggers, \
+    refresh_health_rollups
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Rejected rows kept in the report; the rest are only counted
+MAX_REPORTED_REJECTS = 1000
+
+COLUMNS = ["userID", "date", "heartrate", "VO2max", "HRvariation", "sleeptime"]
+
+# (type, min, max) for the optional metric columns
+METRIC_RANGES = {
+    "heartrate": (float, 0, 300),
+    "VO2max": (float, 0, 100),
+    "HRvariation": (int, 0, 1000),
+    "sleeptime": (float, 0, 24),
+}
+
+UPSERT_SQL = """
+INSERT INTO Health (userID, date, heartrate, VO2max, HRvariation, sleeptime)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (userID, date) DO UPDATE SET
+    heartrate = excluded.heartrate,
+    VO2max = excluded.VO2max,
+    HRvariation = excluded.HRvariation,
+    sleeptime = excluded.sleeptime
+"""
+
+
+def _parse_row(row, user_ids):
+    """Validate one CSV row and return the Health tuple, or raise ValueError"""
+    try:
+        user_id = int(row["userID"])
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid userID {row.get('userID')!r}")
+    if user_id not in user_ids:
+        raise ValueError(f"unknown userID {user_id}")
+    try:
+        day = date.fromisoformat((row["date"] or "").strip()).isoformat()
+    except ValueError:
+        raise ValueError(f"invalid date {row.get('date')!r}")
+
+    values = [user_id, day]
+    for column, (kind, low, high) in METRIC_RANGES.items():
+        raw = (row.get(column) or "").strip()
+        if not raw:
+            values.append(None)
+            continue
+        try:
+            value = float(raw)
+        except ValueError:
+            raise ValueError(f"invalid {column} {raw!r}")
+        if kind is int:
+            # "65.0" is fine, "65.7" is not silently truncated
+            if not value.is_integer():
+                raise ValueError(f"{column} {raw!r} is not a whole number")
+            value = int(value)
+        if not low <= value <= high:
+            raise ValueError(f"{column} {value} outside {low}-{high}")
+        values.append(value)
+    return tuple(values)
+
+
+def _write_batch(conn, batch):
+    """Upsert one batch and rebuild its rollup buckets in one transaction"""
+    cursor = conn.cursor()
+    # Explicit, as the implicit transaction would only start at the upsert
+    cursor.execute("BEGIN IMMEDIATE")
+    drop_health_rollup_triggers(cursor)
+    cursor.executemany(UPSERT_SQL, batch)
+    refresh_health_rollups(cursor, {row[:2] for row in batch})
+    create_health_rollup_triggers(cursor)
+    conn.commit()
+
+
+def _open_text(source):
+    """Accept a path, a text stream or a binary upload"""
+    if isinstance(source, str):
+        return open(source, newline="", encoding="utf-8-sig")
+    if isinstance(source.read(0), bytes):
+        return io.TextIOWrapper(source, newline="", encoding="utf-8-sig")
+    return source
+
+
+@invalidates_cache
+def import_health_csv(source, batch_size=DEFAULT_BATCH_SIZE):
+    """Upsert health records from a CSV file into the Health table.
+
+    source is a path or a file object. Returns a report with the number of
+    imported and rejected rows, rows/sec, and the first rejected rows as
+    (line number, reason).
+    """
+    started = time.perf_counter()
+    imported = 0
+    rejected_count = 0
+    rejected = []
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        user_ids = {row[0] for row in cursor.execute("SELECT userID FROM Users")}
+        f = _open_text(source)
+        try:
+            reader = csv.DictReader(f)
+            # Match the header case-insensitively to the Health column names
+            canonical = {c.lower(): c for c in COLUMNS}
+            reader.fieldnames = [canonical.get((name or "").strip().lower(), name)
+                                 for name in reader.fieldnames or []]
+            missing = {"userID", "date"} - set(reader.fieldnames)
+            if missing:
+                raise ValueError(f"CSV is missing columns: {', '.join(sorted(missing))}")
+
+            batch = []
+            for row in reader:
+                try:
+                    batch.append(_parse_row(row, user_ids))
+                except ValueError as e:
+                    rejected_count += 1
+                    if len(rejected) < MAX_REPORTED_REJECTS:
+                        rejected.append((reader.line_num, str(e)))
+                    continue
+                if len(batch) >= batch_size:
+                    _write_batch(conn, batch)
+                    imported += len(batch)
+                    batch = []
+            if batch:
+                _write_batch(conn, batch)
+                imported += len(batch)
+        finally:
+            if isinstance(source, str):
+                f.close()
+            elif f is not source:
+                # Leave the caller's binary stream open
+                f.detach()
+        seconds = time.perf_counter() - started
+        result = {
+            "success": True,
+            "rows_imported": imported,
+            "rows_rejected": rejected_count,
+            "rejected": rejected,
+            "seconds": seconds,
+            "rows_per_sec": imported / seconds if seconds > 0 else 0.0,
+        }
+    except Exception as e:
+        result = {"success": False, "error": str(e), "rows_imported": imported}
+    finally:
+        conn.close()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import health records from CSV")
+    parser.add_argument("file", help="CSV with userID,date,heartrate,VO2max,HRvariation,sleeptime")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    report = import_health_csv(args.file, args.batch_size)
+    if not report["success"]:
+        raise SystemExit(f"Import failed after {report['rows_imported']} rows: {report['error']}")
+    print(f"Imported {report['rows_imported']} rows in {report['seconds']:.2f}s "
+          f"({report['rows_per_sec']:.0f} rows/sec), rejected {report['rows_rejected']}")
+    for line, reason in report["rejected"]:
+        print(f"  line {line}: {reason}")
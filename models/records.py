@@ -0,0 +1,44 @@
+import pandas as pd
+from db.connection import get_db_connection
+from db.cache import cached_read, invalidates_cache
+from db.schema import personal_records_select
+
+
+@cached_read
+def get_personal_records(user_id=None):
+    """Get each user's best weight and estimated 1RM per exercise"""
+    conn = get_db_connection()
+    where = "WHERE p.userID = ?" if user_id is not None else ""
+    params = (user_id,) if user_id is not None else ()
+    df = pd.read_sql(f"""
+    SELECT p.userID, u.fName || ' ' || u.lName AS userName,
+           p.exerciseID, e.name AS exercise_name,
+           p.maxWeight, ROUND(p.best1RM, 1) AS best1RM, p.workoutID
+    FROM PersonalRecord p
+    JOIN Users u ON u.userID = p.userID
+    JOIN Exercise e ON e.exerciseID = p.exerciseID
+    {where}
+    ORDER BY p.userID, e.name
+    """, conn, params=params)
+    conn.close()
+    return df
+
+
+@invalidates_cache
+def rebuild_personal_records():
+    """Recompute PersonalRecord from every Weightlift set, e.g. after a backfill"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM PersonalRecord")
+        cursor.execute(
+            "INSERT INTO PersonalRecord (userID, exerciseID, maxWeight, best1RM, workoutID)"
+            + personal_records_select())
+        conn.commit()
+        result = {"success": True, "records": cursor.rowcount}
+    except Exception as e:
+        conn.rollback()
+        result = {"success": False, "error": str(e)}
+    finally:
+        conn.close()
+    return result
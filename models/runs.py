@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from db.connection import get_db_connection
+from db.cache import cached_read
+
+# Intervals are grouped into whole-percent incline buckets
+INCLINE_BUCKET = 1.0
+
+
+def _weighted_pace(frame, keys):
+    """Total distance and distance-weighted pace (seconds per km) per group"""
+    totals = frame.groupby(keys, sort=True).agg(
+        intervals=("distance", "size"),
+        total_distance=("distance", "sum"),
+        total_seconds=("seconds", "sum"),
+    )
+    distance = totals["total_distance"].to_numpy(dtype=float)
+    seconds = totals["total_seconds"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pace = np.where(distance > 0, seconds / distance, np.nan)
+    totals["pace"] = pace
+    totals["speed_kmh"] = np.where(pace > 0, 3600.0 / pace, np.nan)
+    return totals.drop(columns="total_seconds").reset_index()
+
+
+@cached_read
+def get_run_analytics(user_id):
+    """Per-workout and per-incline distance and pace for a user's runs.
+
+    All of the user's Run intervals are read in one query. Pace is weighted
+    by distance, i.e. total time over total distance, in seconds per km.
+    """
+    conn = get_db_connection()
+    query = """
+    SELECT
+        w.workoutID,
+        w.startTime,
+        r.distance,
+        r.pace,
+        r.incline
+    FROM
+        Workout w
+    JOIN
+        Run r ON r.workoutID = w.workoutID
+    WHERE
+        w.userID = ?
+    """
+    try:
+        df = pd.read_sql(query, conn, params=(user_id,))
+        df["distance"] = df["distance"].astype(float)
+        df["seconds"] = df["distance"].to_numpy() * df["pace"].to_numpy(dtype=float)
+        df["incline"] = np.floor(
+            df["incline"].fillna(0).to_numpy(dtype=float) / INCLINE_BUCKET
+        ) * INCLINE_BUCKET
+
+        workouts = _weighted_pace(df, ["workoutID", "startTime"])
+        workouts = workouts.sort_values("startTime", ascending=False,
+                                        ignore_index=True)
+        by_incline = _weighted_pace(df, ["incline"])
+        result = {"success": True, "workouts": workouts,
+                  "by_incline": by_incline}
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    finally:
+        conn.close()
+    return result
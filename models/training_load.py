@@ -0,0 +1,281 @@
+import argparse
+from datetime import date
+import numpy as np
+import pandas as pd
+from db import init_db
+from db.connection import get_db_connection
+from db.cache import cached_read
+from db.queue import drain_queue
+
+# Rolling windows, in days
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+# Used when a user has no resting heart rate on record or no date of birth
+DEFAULT_RESTING_HR = 60.0
+DEFAULT_MAX_HR = 190.0
+
+# Banister TRIMP weighting factors (a, b) for women and for everyone else
+TRIMP_FACTORS_FEMALE = (0.86, 1.67)
+TRIMP_FACTORS_MALE = (0.64, 1.92)
+
+# Queue the users whose rows stop before a given day, so the rest days up
+# to it get rows too
+_EXTEND_SQL = """
+INSERT INTO TrainingLoadDirty (userID, fromDay)
+SELECT userID, CAST(strftime('%s', MAX(date)) AS INTEGER) / 86400 + 1
+FROM TrainingLoad
+WHERE true
+GROUP BY userID
+HAVING MAX(date) < ?
+ON CONFLICT (userID) DO UPDATE SET fromDay = MIN(fromDay, excluded.fromDay)
+"""
+
+# Users recomputed per batch, which bounds the workouts, health rows and
+# daily rows held in memory during a refresh; a full refresh at the 10m
+# synthetic scale covers 500k users
+BATCH_USERS = 500
+
+
+def _trimp(workouts):
+    """Banister TRIMP of each workout as a NumPy array.
+
+    The workout's maxHR stands in for its exercise heart rate, the latest
+    resting heart rate on or before the workout day for the resting rate,
+    and 220 - age for the maximum rate. Workouts without a maxHR score 0.
+    """
+    minutes = workouts["durationMinutes"].to_numpy(dtype=float)
+    exercise_hr = workouts["maxHR"].to_numpy(dtype=float)
+    resting_hr = workouts["heartrate"].fillna(DEFAULT_RESTING_HR).to_numpy(dtype=float)
+    age = (workouts["day"].to_numpy() - workouts["dobDay"].to_numpy(dtype=float)) / 365.25
+    max_hr = np.where(np.isnan(age), DEFAULT_MAX_HR, 220.0 - age)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reserve = (exercise_hr - resting_hr) / (max_hr - resting_hr)
+    reserve = np.clip(np.nan_to_num(reserve), 0.0, 1.0)
+
+    female = (workouts["sex"] == "F").to_numpy()
+    a = np.where(female, TRIMP_FACTORS_FEMALE[0], TRIMP_FACTORS_MALE[0])
+    b = np.where(female, TRIMP_FACTORS_FEMALE[1], TRIMP_FACTORS_MALE[1])
+    return np.nan_to_num(minutes) * reserve * a * np.exp(b * reserve)
+
+
+def _daily_loads(workouts, from_day, end_day):
+    """Daily load, acute and chronic averages and ACWR for every queued user.
+
+    workouts holds (userID, day, trimp) sorted by userID. Each user gets one contiguous run of
+    days from their first loaded workout to end_day (or their last workout,
+    if later) in a single flat array, so the rolling sums for all users
+    come from one cumulative sum and rest days decay the averages. Only
+    days on or after the user's from_day are returned.
+    """
+    user_ids, first = np.unique(workouts["userID"].to_numpy(), return_index=True)
+    days = workouts["day"].to_numpy()
+    lo = days[first]
+    hi = np.maximum(np.maximum.reduceat(days, first), end_day)
+    lengths = hi - lo + 1
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    segment = np.repeat(np.arange(len(user_ids)), lengths)
+    position = np.arange(lengths.sum())
+    start = offsets[segment]
+    day = lo[segment] + position - start
+
+    load = np.zeros(len(position))
+    workout_segment = np.searchsorted(user_ids, workouts["userID"].to_numpy())
+    np.add.at(load, offsets[workout_segment] + days - lo[workout_segment],
+              workouts["trimp"].to_numpy())
+
+    cumulative = np.concatenate(([0.0], np.cumsum(load)))
+    acute = (cumulative[position + 1]
+             - cumulative[np.maximum(position + 1 - ACUTE_DAYS, start)]) / ACUTE_DAYS
+    chronic = (cumulative[position + 1]
+               - cumulative[np.maximum(position + 1 - CHRONIC_DAYS, start)]) / CHRONIC_DAYS
+    with np.errstate(divide="ignore", invalid="ignore"):
+        acwr = np.where(chronic > 0, acute / chronic, np.nan)
+
+    user = user_ids[segment]
+    keep = day >= from_day.reindex(user).to_numpy()
+    return pd.DataFrame({
+        "userID": user[keep],
+        "date": pd.to_datetime(day[keep], unit="D").strftime("%Y-%m-%d"),
+        "load": load[keep],
+        "acute": acute[keep],
+        "chronic": chronic[keep],
+        "acwr": acwr[keep],
+    })
+
+
+def _refresh_batch(conn, dirty, today):
+    """Recompute the TrainingLoad rows of one batch of queued users.
+
+    dirty holds (userID, fromDay, history) sorted by userID. Returns the
+    number of rows written.
+    """
+    bounds = (int(dirty["userID"].iloc[0]), int(dirty["userID"].iloc[-1]))
+    workouts = pd.read_sql("""
+    SELECT w.userID, w.startTime / 86400 AS day, w.durationMinutes, w.maxHR,
+           u.sex, CAST(strftime('%s', u.DOB) AS INTEGER) / 86400 AS dobDay
+    FROM TrainingLoadDirty d
+    JOIN Workout w
+      ON w.userID = d.userID AND w.startTime >= (d.fromDay - ? + 1) * 86400
+    JOIN Users u ON u.userID = w.userID
+    WHERE d.userID BETWEEN ? AND ?
+    """, conn, params=(CHRONIC_DAYS,) + bounds)
+    health = pd.read_sql("""
+    SELECT h.userID, h.date, h.heartrate
+    FROM TrainingLoadDirty d
+    JOIN Health h ON h.userID = d.userID
+    WHERE d.userID BETWEEN ? AND ? AND h.heartrate IS NOT NULL
+    """, conn, params=bounds)
+
+    if not workouts.empty:
+        # Latest resting heart rate on or before each workout's day
+        health["day"] = (pd.to_datetime(health["date"]) - pd.Timestamp(0)) \
+            // pd.Timedelta(days=1)
+        workouts = pd.merge_asof(
+            workouts.sort_values("day"), health.sort_values("day")[["userID", "day", "heartrate"]],
+            on="day", by="userID", direction="backward")
+        workouts["trimp"] = _trimp(workouts)
+    # A zero-load day at fromDay starts the rows of users with history
+    anchors = dirty.loc[dirty["history"].astype(bool), ["userID", "fromDay"]] \
+        .rename(columns={"fromDay": "day"}).assign(trimp=0.0)
+    days = pd.concat([workouts.reindex(columns=["userID", "day", "trimp"]), anchors],
+                     ignore_index=True)
+
+    rows = []
+    if not days.empty:
+        days = days.astype({"userID": "int64", "day": "int64", "trimp": "float64"}) \
+            .sort_values(["userID", "day"], kind="stable")
+        loads = _daily_loads(days, dirty.set_index("userID")["fromDay"], today)
+        loads = loads.astype(object).where(loads.notna(), None)
+        rows = list(loads.itertuples(index=False, name=None))
+
+    cursor = conn.cursor()
+    from_dates = pd.to_datetime(dirty["fromDay"], unit="D").dt.strftime("%Y-%m-%d")
+    cursor.executemany("DELETE FROM TrainingLoad WHERE userID = ? AND date >= ?",
+                       list(zip(dirty["userID"].tolist(), from_dates)))
+    cursor.executemany(
+        "INSERT INTO TrainingLoad (userID, date, load, acute, chronic, acwr) VALUES (?, ?, ?, ?, ?, ?)",
+        rows)
+    return len(rows)
+
+
+def refresh_training_load(full=False, max_users=None, batch_users=BATCH_USERS):
+    """Bring TrainingLoad up to date.
+
+    By default each user queued in TrainingLoadDirty is recomputed from the
+    earliest day that changed, reading only the workouts in the chronic
+    window before it; full=True recomputes every user from scratch. Rows
+    run up to today. max_users caps the users recomputed in this call, in
+    userID order, and the rest stay queued. The queue is worked through
+    batch_users users at a time, all in one transaction. Returns the rows
+    written and the users still pending.
+    """
+    today = (date.today() - date(1970, 1, 1)).days
+
+    def recompute(conn):
+        cursor = conn.cursor()
+        limit_users = max_users
+        if full:
+            cursor.execute("DELETE FROM TrainingLoad")
+            cursor.execute("""
+            INSERT INTO TrainingLoadDirty (userID, fromDay)
+            SELECT userID, MIN(startTime) / 86400 FROM Workout WHERE true GROUP BY userID
+            ON CONFLICT (userID) DO UPDATE SET fromDay = MIN(fromDay, excluded.fromDay)
+            """)
+            limit_users = None
+
+        refreshed = 0
+        users = 0
+        last_user = -1
+        while limit_users is None or users < limit_users:
+            limit = batch_users if limit_users is None else min(batch_users, limit_users - users)
+            # history: the user has workouts before fromDay, so their rows go
+            # on from fromDay even where no workout falls in the chronic window
+            dirty = pd.read_sql("""
+            SELECT d.userID, d.fromDay,
+                   EXISTS (SELECT 1 FROM Workout w
+                           WHERE w.userID = d.userID AND w.startTime < d.fromDay * 86400) AS history
+            FROM TrainingLoadDirty d
+            WHERE d.userID > ?
+            ORDER BY d.userID
+            LIMIT ?
+            """, conn, params=(last_user, limit))
+            if dirty.empty:
+                break
+            refreshed += _refresh_batch(conn, dirty, today)
+            users += len(dirty)
+            last_user = int(dirty["userID"].iloc[-1])
+
+        cursor.execute("DELETE FROM TrainingLoadDirty WHERE userID <= ?", (last_user,))
+        cursor.execute("SELECT COUNT(*) FROM TrainingLoadDirty")
+        return {"refreshed": refreshed, "pending": cursor.fetchone()[0]}
+
+    return drain_queue("TrainingLoadDirty", recompute, full,
+                       {"refreshed": 0, "pending": 0})
+
+
+def extend_training_load():
+    """Queue every user whose rows stop before today.
+
+    Their next refresh adds rows for the rest days since, so acute and
+    chronic load decay. Run once a day, before a refresh, by the
+    python -m models.training_load job rather than on a page render: it
+    queues nearly every user.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(_EXTEND_SQL, (date.today().isoformat(),))
+        conn.commit()
+        result = {"success": True, "queued": cursor.rowcount}
+    except Exception as e:
+        conn.rollback()
+        result = {"success": False, "error": str(e)}
+    finally:
+        conn.close()
+    return result
+
+
+@cached_read
+def get_training_load(user_id, start_date, end_date):
+    """Get one user's daily training load over a date range as of the last refresh.
+
+    start_date and end_date are datetime.date objects.
+    """
+    conn = get_db_connection()
+    df = pd.read_sql("""
+    SELECT date, load, acute, chronic, acwr
+    FROM TrainingLoad
+    WHERE userID = ? AND date BETWEEN ? AND ?
+    ORDER BY date
+    """, conn, params=(user_id, start_date.isoformat(), end_date.isoformat()))
+    conn.close()
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Extend TrainingLoad through today and drain its queue; run daily")
+    parser.add_argument("--full", action="store_true",
+                        help="Recompute every user from scratch instead")
+    args = parser.parse_args()
+
+    init_db()
+    if not args.full:
+        report = extend_training_load()
+        if not report["success"]:
+            raise SystemExit(f"Extending failed: {report['error']}")
+        print(f"Queued {report['queued']} users to extend through today")
+    # One transaction per batch of users, so writers aren't locked out for
+    # the whole run; a full recompute has to replace the table at once
+    refreshed = 0
+    while True:
+        report = refresh_training_load(args.full, None if args.full else BATCH_USERS)
+        if not report["success"]:
+            raise SystemExit(f"Refresh failed after {refreshed} rows: {report['error']}")
+        refreshed += report["refreshed"]
+        if not report["pending"]:
+            break
+    print(f"Wrote {refreshed} TrainingLoad rows")
@@ -1,6 +1,8 @@
 import pandas as pd
 from db.connection import get_db_connection
+from db.cache import cached_read, invalidates_cache
 
+@cached_read
 def get_all_users():
     """Get all users from the database"""
     conn = get_db_connection()
@@ -8,6 +10,7 @@ def get_all_users():
     conn.close()
     return df
 
+@cached_read
 def get_user_by_id(user_id):
     """Get a specific user by ID"""
     conn = get_db_connection()
@@ -15,6 +18,7 @@ def get_user_by_id(user_id):
     conn.close()
     return df
 
+@invalidates_cache
 def add_user(fname, lname, weight, dob, sex):
     """Add a new user to the database"""
     conn = get_db_connection()
@@ -32,6 +36,7 @@ def add_user(fname, lname, weight, dob, sex):
         conn.close()
     return result
 
+@invalidates_cache
 def update_user(user_id, fname, lname, weight, dob, sex):
     """Update an existing user"""
     conn = get_db_connection()
@@ -49,6 +54,7 @@ def update_user(user_id, fname, lname, weight, dob, sex):
         conn.close()
     return result
 
+@invalidates_cache
 def delete_user(user_id):
     """Delete a user from the database"""
     conn = get_db_connection()
@@ -63,6 +69,7 @@ def delete_user(user_id):
         conn.close()
     return result
 
+@cached_read
 def get_user_ids():
     """Get all user IDs for dropdowns"""
     conn = get_db_connection()
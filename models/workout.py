@@ -1,6 +1,44 @@
+import calendar
+import numbers
+from datetime import date, datetime, time
 import pandas as pd
 from db.connection import get_db_connection
+from db.cache import cached_read, invalidates_cache, bump_generation
+from db.catalog import resolve_column, invalidate
 
+# Allowed Workout.workoutType values (see the table's CHECK constraint)
+WORKOUT_TYPES = ("Run", "Weightlift")
+
+
+def to_epoch(value):
+    """Convert a workout time to the epoch seconds stored in Workout.
+
+    Accepts a datetime, a date (taken as midnight), an ISO
+    "YYYY-MM-DD HH:MM:SS" string or epoch seconds, including numpy
+    numbers. Naive times are wall-clock times and are stored as if UTC.
+    """
+    if isinstance(value, numbers.Real):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    if value.tzinfo is not None:
+        return int(value.timestamp())
+    return calendar.timegm(value.timetuple())
+
+
+def pace_to_seconds(value):
+    """Convert a pace to the seconds per km stored in Run.
+
+    Accepts seconds or an "mm:ss" string.
+    """
+    if isinstance(value, str):
+        minutes, seconds = value.split(":")
+        return int(minutes) * 60 + int(seconds)
+    return int(value)
+
+@cached_read
 def get_all_workouts():
     """Retrieve all workouts"""
     conn = get_db_connection()
@@ -8,6 +46,75 @@ def get_all_workouts():
     conn.close()
     return df
 
+@cached_read
+def get_workouts_page(cursor=None, page_size=50):
+    """Retrieve one page of workouts, newest first.
+
+    cursor is the (startTime, workoutID) of the last row of the previous
+    page, or None for the first page. The result includes the cursor for
+    the next page, which is None on the last page.
+    """
+    conn = get_db_connection()
+    where = "WHERE (startTime, workoutID) < (?, ?)" if cursor else ""
+    params = tuple(cursor or ()) + (page_size + 1,)
+    try:
+        df = pd.read_sql(f"""
+        SELECT * FROM Workout
+        {where}
+        ORDER BY startTime DESC, workoutID DESC
+        LIMIT ?
+        """, conn, params=params)
+        next_cursor = None
+        if len(df) > page_size:
+            df = df.iloc[:page_size]
+            last = df.iloc[-1]
+            next_cursor = (int(last["startTime"]), int(last["workoutID"]))
+        result = {"success": True, "data": df, "next_cursor": next_cursor}
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    finally:
+        conn.close()
+    return result
+
+@cached_read
+def search_workouts(user_id=None, start_date=None, end_date=None,
+                    workout_type=None, limit=50):
+    """Find at most limit workouts matching the given filters, newest first.
+
+    Dates are inclusive "YYYY-MM-DD" strings or dates and None means no
+    filter. The result's "more" flag tells whether further matches exist.
+    """
+    conditions, params = [], []
+    if user_id is not None:
+        conditions.append("userID = ?")
+        params.append(user_id)
+    if start_date is not None:
+        conditions.append("startTime >= ?")
+        params.append(to_epoch(str(start_date)))
+    if end_date is not None:
+        conditions.append("startTime < ?")
+        params.append(to_epoch(str(end_date)) + 86400)
+    if workout_type is not None:
+        conditions.append("workoutType = ?")
+        params.append(workout_type)
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+
+    conn = get_db_connection()
+    try:
+        df = pd.read_sql(f"""
+        SELECT workoutID, userID, startTime, workoutType FROM Workout
+        {where}
+        ORDER BY startTime DESC
+        LIMIT ?
+        """, conn, params=params + [limit + 1])
+        result = {"success": True, "data": df.iloc[:limit], "more": len(df) > limit}
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    finally:
+        conn.close()
+    return result
+
+@cached_read
 def get_workouts_by_user(user_id):
     """Retrieve workouts for a specific user"""
     conn = get_db_connection()
@@ -16,6 +123,7 @@ def get_workouts_by_user(user_id):
     conn.close()
     return df
 
+@invalidates_cache
 def add_workout(user_id, start_time, end_time, max_hr, workout_type):
     """Add a new workout"""
     conn = get_db_connection()
@@ -23,7 +131,7 @@ def add_workout(user_id, start_time, end_time, max_hr, workout_type):
     try:
         cursor.execute(
             "INSERT INTO Workout (userID, startTime, endTime, maxHR, workoutType) VALUES (?, ?, ?, ?, ?)",
-            (user_id, start_time, end_time, max_hr, workout_type)
+            (user_id, to_epoch(start_time), to_epoch(end_time), max_hr, workout_type)
         )
         conn.commit()
         result = {"success": True, "workout_id": cursor.lastrowid}
@@ -33,6 +141,7 @@ def add_workout(user_id, start_time, end_time, max_hr, workout_type):
         conn.close()
     return result
 
+@invalidates_cache
 def update_workout(workout_id, user_id, start_time, end_time, max_hr, workout_type):
     """Update an existing workout"""
     conn = get_db_connection()
@@ -40,7 +149,7 @@ def update_workout(workout_id, user_id, start_time, end_time, max_hr, workout_ty
     try:
         cursor.execute(
             "UPDATE Workout SET userID=?, startTime=?, endTime=?, maxHR=?, workoutType=? WHERE workoutID=?",
-            (user_id, start_time, end_time, max_hr, workout_type, workout_id)
+            (user_id, to_epoch(start_time), to_epoch(end_time), max_hr, workout_type, workout_id)
         )
         conn.commit()
         result = {"success": True, "rows_affected": cursor.rowcount}
@@ -50,6 +159,7 @@ def update_workout(workout_id, user_id, start_time, end_time, max_hr, workout_ty
         conn.close()
     return result
 
+@invalidates_cache
 def delete_workout(workout_id):
     """Delete a workout"""
     conn = get_db_connection()
@@ -64,6 +174,7 @@ def delete_workout(workout_id):
         conn.close()
     return result
 
+@cached_read
 def get_workout_ids():
     """Get all workout IDs for dropdowns"""
     conn = get_db_connection()
@@ -73,6 +184,7 @@ def get_workout_ids():
     conn.close()
     return workout_ids
 
+@cached_read
 def get_workout_statistics():
     """Get workout statistics for visualization"""
     conn = get_db_connection()
@@ -81,7 +193,7 @@ def get_workout_statistics():
         u.userID,
         u.fName || ' ' || u.lName AS userName,
         w.workoutType,
-        AVG(JULIANDAY(w.endTime) - JULIANDAY(w.startTime)) * 24 * 60 AS avgDurationMinutes
+        AVG(w.durationMinutes) AS avgDurationMinutes
     FROM 
         Users u
     JOIN 
@@ -101,26 +213,20 @@ def get_workout_statistics():
     return result
 
 
+@invalidates_cache
 def add_run_interval(workout_id, interval_nr, distance, pace, incline):
     """Add a new running interval to a run workout"""
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        # Check the columns in the Run table
-        cursor.execute("PRAGMA table_info(Run)")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
-
-        # Use the correct column name based on what's in the database
-        interval_column = "intervalNr" if "intervalNr" in column_names else "intervalNr"
-        if "intervalNR" in column_names:
-            interval_column = "intervalNR"
+        interval_column = resolve_column("Run", "intervalNr") or "intervalNr"
 
         # Create the SQL query dynamically based on the actual column name
         query = f"INSERT INTO Run (workoutID, {interval_column}, distance, pace, incline) VALUES (?, ?, ?, ?, ?)"
 
         cursor.execute(query,
-                       (workout_id, interval_nr, distance, pace, incline))
+                       (workout_id, interval_nr, distance,
+                        pace_to_seconds(pace), incline))
         conn.commit()
         result = {"success": True}
     except Exception as e:
@@ -129,6 +235,7 @@ def add_run_interval(workout_id, interval_nr, distance, pace, incline):
         conn.close()
     return result
 
+@invalidates_cache
 def add_weightlift_set(workout_id, exercise_id, set_nr, reps, weight):
     """Add a new weightlifting set to a weightlift workout"""
     conn = get_db_connection()
@@ -147,25 +254,83 @@ def add_weightlift_set(workout_id, exercise_id, set_nr, reps, weight):
     return result
 
 
+def _create_workout(workout, workout_type, child_query, child_rows):
+    """Insert a workout and its child rows in a single transaction"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO Workout (userID, startTime, endTime, maxHR, workoutType) VALUES (?, ?, ?, ?, ?)",
+            (workout["user_id"], to_epoch(workout["start_time"]),
+             to_epoch(workout["end_time"]), workout["max_hr"], workout_type)
+        )
+        workout_id = cursor.lastrowid
+        cursor.executemany(child_query,
+                           [(workout_id,) + tuple(row) for row in child_rows])
+        conn.commit()
+        result = {"success": True, "workout_id": workout_id}
+    except Exception as e:
+        conn.rollback()
+        result = {"success": False, "error": str(e)}
+    finally:
+        conn.close()
+    return result
+
+
+@invalidates_cache
+def create_run_workout(workout, intervals):
+    """Add a run workout together with all of its intervals atomically.
+
+    workout holds user_id, start_time, end_time and max_hr; each interval
+    holds interval_nr, distance, pace (seconds per km or "mm:ss") and
+    incline.
+    """
+    interval_column = resolve_column("Run", "intervalNr") or "intervalNr"
+    rows = [(i["interval_nr"], i["distance"], pace_to_seconds(i["pace"]),
+             i["incline"])
+            for i in intervals]
+    return _create_workout(
+        workout, "Run",
+        f"INSERT INTO Run (workoutID, {interval_column}, distance, pace, incline) VALUES (?, ?, ?, ?, ?)",
+        rows)
+
+
+@invalidates_cache
+def create_weightlift_workout(workout, sets):
+    """Add a weightlift workout together with all of its sets atomically.
+
+    workout holds user_id, start_time, end_time and max_hr; each set holds
+    exercise_id, set_nr, reps and weight. Each (exercise_id, set_nr) pair
+    may appear only once.
+    """
+    rows = [(s["exercise_id"], s["set_nr"], s["reps"], s["weight"])
+            for s in sets]
+    # Checked up front for a clearer error than the primary key violation
+    seen = set()
+    for exercise_id, set_nr, _, _ in rows:
+        if (exercise_id, set_nr) in seen:
+            return {"success": False,
+                    "error": f"Exercise {exercise_id} has more than one set {set_nr}; "
+                             f"list each exercise once and number its sets uniquely"}
+        seen.add((exercise_id, set_nr))
+    return _create_workout(
+        workout, "Weightlift",
+        "INSERT INTO Weightlift (workoutID, exerciseID, setNr, reps, weight) VALUES (?, ?, ?, ?, ?)",
+        rows)
+
+
+@cached_read
 def get_exercises():
     """Get all exercises for dropdowns"""
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        # Check if the Exercise table exists and has the correct structure
-        cursor.execute("PRAGMA table_info(Exercise)")
-        columns = cursor.fetchall()
-        column_names = [col[1].lower() for col in columns]
+        # Find the actual column names (respecting case) from the catalog
+        name_col = resolve_column("Exercise", "name")
+        muscle_col = resolve_column("Exercise", "muscleGroup")
 
         # If the table structure is correct
-        if 'name' in column_names and 'musclegroup' in column_names:
-            # Find the actual column names (respecting case)
-            name_col = next(
-                (col[1] for col in columns if col[1].lower() == 'name'), None)
-            muscle_col = next(
-                (col[1] for col in columns if col[1].lower() == 'musclegroup'),
-                None)
-
+        if name_col and muscle_col:
             # Build the query using the actual column names
             query = f"SELECT exerciseID, {name_col}, {muscle_col} FROM Exercise"
             cursor.execute(query)
@@ -183,6 +348,7 @@ def get_exercises():
               muscleGroup VARCHAR(32)
             )
             """)
+            invalidate()
 
             cursor.execute("SELECT COUNT(*) FROM Exercise")
             count = cursor.fetchone()[0]
@@ -200,6 +366,7 @@ def get_exercises():
                     sample_exercises
                 )
                 conn.commit()
+                bump_generation()
 
                 cursor.execute(
                     "SELECT exerciseID, name, muscleGroup FROM Exercise")
@@ -5,6 +5,7 @@ from pathlib import Path
 # Add the project root to the Python path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from db import init_db
 from pages.components.exercises import exercises_page
 
 st.set_page_config(
@@ -13,4 +14,7 @@ st.set_page_config(
     layout="wide"
 )
 
-exercises_page()
\ No newline at end of file
+# Bring the schema up to date whichever page is opened first
+init_db()
+
+exercises_page()
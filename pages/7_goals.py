@@ -6,6 +6,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # Import the goals page functions
+from db import init_db
 from pages.components.goals import goals_page
 
 # Set page config
@@ -15,5 +16,8 @@ st.set_page_config(
     layout="wide"
 )
 
+# Bring the schema up to date whichever page is opened first
+init_db()
+
 # Display the goals page
-goals_page()
\ No newline at end of file
+goals_page()
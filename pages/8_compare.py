@@ -0,0 +1,20 @@
+import streamlit as st
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db import init_db
+from pages.components.compare import compare_page
+
+st.set_page_config(
+    page_title="Compare | Fitness Tracker",
+    page_icon="🏆",
+    layout="wide"
+)
+
+# Bring the schema up to date whichever page is opened first
+init_db()
+
+compare_page()
@@ -0,0 +1,78 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from config import db_config
+from db import get_pool_stats
+from db.cache import get_cache_stats
+from db.tracing import HISTOGRAM_BUCKETS_MS, enable_tracing, disable_tracing, \
+    tracing_enabled, reset_query_stats, get_query_stats, get_slow_queries
+from pages.components.profiler import profiled_page
+
+
+def _bucket_labels():
+    labels = [f"≤ {bound:g} ms" for bound in HISTOGRAM_BUCKETS_MS]
+    return labels + [f"> {HISTOGRAM_BUCKETS_MS[-1]:g} ms"]
+
+
+@profiled_page
+def admin_page():
+    """Connection pool, read cache and query tracing statistics"""
+    st.header("Admin")
+
+    # Pools and cache
+    st.subheader("Connection Pools")
+    pool_stats = get_pool_stats()
+    if pool_stats:
+        st.dataframe(pd.DataFrame.from_dict(pool_stats, orient="index"))
+    else:
+        st.info("No connection pool has been opened yet.")
+
+    st.subheader("Read Cache")
+    cache_stats = get_cache_stats()
+    cols = st.columns(len(cache_stats))
+    for col, (name, value) in zip(cols, cache_stats.items()):
+        col.metric(name.replace("_", " ").capitalize(), value)
+
+    # Query tracing
+    st.subheader("Query Tracing")
+    enabled = st.toggle("Trace queries", value=tracing_enabled(),
+                        help="Time every statement run on pooled connections")
+    if enabled != tracing_enabled():
+        if enabled:
+            enable_tracing()
+        else:
+            disable_tracing()
+        st.rerun()
+    if st.button("Reset statistics"):
+        reset_query_stats()
+        st.rerun()
+
+    stats = get_query_stats()
+    if not stats:
+        st.info("No statements traced yet. Turn tracing on and use the other pages.")
+        return
+
+    stats_df = pd.DataFrame(stats).drop(columns="histogram")
+    st.dataframe(stats_df.round(2))
+
+    st.subheader("Latency Histogram")
+    sql = st.selectbox("Statement", [row["sql"] for row in stats])
+    histogram = next(row["histogram"] for row in stats if row["sql"] == sql)
+    fig = px.bar(
+        x=_bucket_labels(),
+        y=histogram,
+        labels={"x": "Duration", "y": "Calls"},
+    )
+    st.plotly_chart(fig)
+
+    st.subheader("Slow Queries")
+    st.write(f"Statements taking {db_config.SLOW_QUERY_MS} ms or more, newest first.")
+    slow = get_slow_queries()
+    if not slow:
+        st.info("No slow queries recorded.")
+    for entry in slow:
+        with st.expander(f"{entry['time']}  {entry['ms']:.1f} ms  {entry['caller']}"):
+            st.code(entry["sql"], language="sql")
+            st.write(f"Rows: {entry['rows']}, trigger statements: "
+                     f"{entry['trigger_statements']}")
+            st.text(entry["plan"])
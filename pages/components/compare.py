@@ -0,0 +1,79 @@
+import streamlit as st
+import plotly.express as px
+from models.user import get_user_ids
+from models.compare import LEADERBOARD_METRICS, get_leaderboard, \
+    compare_users
+from pages.components.profiler import profiled_page
+
+WINDOWS = {
+    "Last 7 days": 7,
+    "Last 4 weeks": 28,
+    "Last 3 months": 91,
+    "Last year": 365,
+    "All time": None,
+}
+
+
+@profiled_page
+def compare_page():
+    """Leaderboards and side-by-side comparison of two users"""
+    st.header("Compare Users")
+
+    window_label = st.selectbox("Window", list(WINDOWS), index=1)
+    window_days = WINDOWS[window_label]
+
+    # Leaderboard
+    st.subheader("Leaderboard")
+    col1, col2 = st.columns(2)
+    with col1:
+        metric = st.selectbox(
+            "Metric", list(LEADERBOARD_METRICS),
+            format_func=lambda m: LEADERBOARD_METRICS[m][0])
+    with col2:
+        top_n = st.number_input("Show top", min_value=1, max_value=100,
+                                value=10)
+
+    result = get_leaderboard(metric, window_days, top_n)
+    if not result["success"]:
+        st.error(f"Error retrieving leaderboard: {result['error']}")
+    elif result["data"].empty:
+        st.info("No user has data for this metric in the selected window.")
+    else:
+        leaderboard_df = result["data"]
+        label = LEADERBOARD_METRICS[metric][0]
+        fig = px.bar(
+            leaderboard_df,
+            x='userName',
+            y='value',
+            labels={'userName': 'User Name', 'value': label},
+            title=f'Top {len(leaderboard_df)} by {label} ({window_label.lower()})'
+        )
+        st.plotly_chart(fig)
+        st.dataframe(leaderboard_df)
+
+    # Pairwise comparison
+    st.subheader("Compare Two Users")
+    user_ids = get_user_ids()
+    if len(user_ids) < 2:
+        st.info("Add at least two users to compare them.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        user_a = st.selectbox("First User", user_ids, key="compare_user_a")
+    with col2:
+        # Comparing a user with themselves would repeat the column labels
+        user_b = st.selectbox("Second User",
+                              [u for u in user_ids if u != user_a],
+                              key="compare_user_b")
+
+    result = compare_users(user_a, user_b, window_days)
+    if not result["success"]:
+        st.error(f"Error comparing users: {result['error']}")
+        return
+
+    comparison_df = result["data"]
+    comparison_df.columns = [
+        'Metric', 'Users Ranked', f'User {user_a}', f'Rank of {user_a}',
+        f'User {user_b}', f'Rank of {user_b}']
+    st.dataframe(comparison_df)
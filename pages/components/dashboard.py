@@ -1,13 +1,41 @@
+from datetime import date, timedelta
 import streamlit as st
 import plotly.express as px
+from db.fanout import run_reads
 from models.workout import get_workout_statistics
+from models.analytics import get_user_progress_overview, \
+    get_exercise_effectiveness, refresh
+from models.training_load import get_training_load, refresh_training_load
+from models.user import get_user_ids
+from pages.components.profiler import profiled_page
 
+# Days of training load charted, ending today
+TRAINING_LOAD_DAYS = 90
 
+# Most queued users whose training load a render recomputes
+TRAINING_LOAD_REFRESH_USERS = 50
+
+
+@profiled_page
 def dashboard_page():
     """Dashboard page with data visualization"""
     st.header("Data Visualization")
 
-    stats_result = get_workout_statistics()
+    # Bring the aggregate tables up to date here, the readers can't write.
+    # Training load only for a bounded number of queued users, so a render
+    # never waits on the daily extension job's queue.
+    refresh()
+    load_refresh = refresh_training_load(max_users=TRAINING_LOAD_REFRESH_USERS)
+
+    # The panels' queries are independent, so run them concurrently
+    results = run_reads({
+        "workout_stats": (get_workout_statistics, ()),
+        "progress": (get_user_progress_overview, ()),
+        "exercises": (get_exercise_effectiveness, ()),
+        "user_ids": (get_user_ids, ()),
+    })
+
+    stats_result = results["workout_stats"]
 
     if stats_result["success"] and not stats_result["data"].empty:
         df = stats_result["data"]
@@ -39,4 +67,78 @@ def dashboard_page():
                 f"Error retrieving statistics: {stats_result.get('error', 'Unknown error')}")
         else:
             st.info(
-                "No workout data available for visualization. Please add some workouts first.")
\ No newline at end of file
+                "No workout data available for visualization. Please add some workouts first.")
+
+    # User progress
+    progress_df = results["progress"]
+    if isinstance(progress_df, dict):
+        st.error(f"Error retrieving user progress: {progress_df['error']}")
+    elif not progress_df.empty:
+        st.subheader("User Progress Overview")
+        st.dataframe(progress_df)
+
+    # Exercise effectiveness
+    exercises_df = results["exercises"]
+    if isinstance(exercises_df, dict):
+        st.error(f"Error retrieving exercise statistics: {exercises_df['error']}")
+    elif not exercises_df.empty:
+        st.subheader("Exercise Usage")
+        fig = px.bar(
+            exercises_df,
+            x='exercise_name',
+            y='times_performed',
+            color='muscleGroup',
+            labels={
+                'exercise_name': 'Exercise',
+                'times_performed': 'Workouts Performed In',
+                'muscleGroup': 'Muscle Group'
+            },
+            title='How Often Each Exercise Is Performed'
+        )
+        st.plotly_chart(fig)
+
+    # Training load, one user over a recent window so the read stays on
+    # the (userID, date) key however many users there are
+    user_ids = results["user_ids"]
+    if not user_ids:
+        return
+    st.subheader(f"Training Load, Last {TRAINING_LOAD_DAYS} Days")
+    load_user = st.selectbox("User", user_ids, key="training_load_user")
+    end_date = date.today()
+    start_date = end_date - timedelta(days=TRAINING_LOAD_DAYS - 1)
+    load_df = get_training_load(load_user, start_date, end_date)
+    if not load_refresh["success"]:
+        st.error(f"Error refreshing training load: {load_refresh['error']}")
+    elif load_refresh["pending"]:
+        st.warning(f"Training load of {load_refresh['pending']} users is still being "
+                   f"recomputed and may be out of date.")
+    if not load_df.empty and load_df["date"].iloc[-1] < end_date.isoformat():
+        st.caption(f"Shown up to {load_df['date'].iloc[-1]}. Rest days since are added "
+                   f"by the daily python -m models.training_load job.")
+    if load_df.empty:
+        st.info("No training load in this window. Add some workouts with a max heart rate.")
+    else:
+        fig = px.line(
+            load_df,
+            x='date',
+            y=['acute', 'chronic'],
+            labels={
+                'date': 'Date',
+                'value': 'Load (TRIMP/day)',
+                'variable': 'Window'
+            },
+            title='Acute (7-day) and Chronic (28-day) Training Load'
+        )
+        st.plotly_chart(fig)
+
+        fig = px.line(
+            load_df,
+            x='date',
+            y='acwr',
+            labels={
+                'date': 'Date',
+                'acwr': 'Acute:Chronic Ratio'
+            },
+            title='Acute:Chronic Workload Ratio'
+        )
+        st.plotly_chart(fig)
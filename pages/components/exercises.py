@@ -7,8 +7,11 @@ from models.exercise import (
     delete_exercise,
     get_exercise_by_id
 )
+from models.records import get_personal_records
+from pages.components.profiler import profiled_page
 
 
+@profiled_page
 def exercises_page():
     """Exercise management page - CRUD operations for exercises"""
     st.header("Exercise Management")
@@ -109,4 +112,11 @@ def exercises_page():
                     st.success("Exercise deleted successfully!")
                     st.rerun()
                 else:
-                    st.error(f"Error deleting exercise: {result['error']}")
\ No newline at end of file
+                    st.error(f"Error deleting exercise: {result['error']}")
+
+    # Personal records
+    records_df = get_personal_records()
+    if not records_df.empty:
+        st.subheader("Personal Records")
+        st.write("Heaviest set and best estimated one-rep max (Epley) per user and exercise:")
+        st.dataframe(records_df)
@@ -9,14 +9,20 @@ from models.goals import (
     update_goal,
     delete_goal,
     get_common_goal_names,
-    get_common_metrics
+    get_common_metrics,
+    evaluate_goals
 )
+from pages.components.profiler import profiled_page
 
 
+@profiled_page
 def goals_page():
     """Goals management page - CRUD operations for fitness goals"""
     st.header("Goal Tracking")
 
+    # Measure progress for goals whose data changed since the last visit
+    evaluate_goals()
+
     # Read operation - display all goals
     goals_df = get_all_goals()
 
@@ -24,10 +30,13 @@ def goals_page():
         # Format the completed column for better display
         goals_df['Status'] = goals_df['completed'].apply(
             lambda x: '✅ Completed' if x == 1 else '⏳ In Progress')
+        goals_df['progress'] = goals_df['progress'].round(1)
+        goals_df['progressPercent'] = goals_df['progressPercent'].round()
         display_df = goals_df[
-            ['userID', 'userName', 'goalName', 'amount', 'metric', 'Status']]
+            ['userID', 'userName', 'goalName', 'amount', 'metric', 'progress',
+             'progressPercent', 'Status']]
         display_df.columns = ['User ID', 'User Name', 'Goal', 'Amount',
-                              'Metric', 'Status']
+                              'Metric', 'Progress', 'Progress (%)', 'Status']
 
         st.write("Current Goals:")
         st.dataframe(display_df)
@@ -132,10 +141,14 @@ def goals_page():
                                                    value=True if goal_row[
                                                                      'completed'] == 1 else False)
 
-                    # Progress visualization if not completed
-                    if not update_completed:
-                        progress_percent = st.slider("Progress (%)", 0, 100, 50)
-                        st.progress(progress_percent / 100)
+                    # Measured progress, for goals evaluate_goals can track
+                    if pd.notna(goal_row['progressPercent']):
+                        st.progress(goal_row['progressPercent'] / 100,
+                                    text=f"{goal_row['progress']:.1f} of "
+                                         f"{goal_row['amount']} {goal_row['metric']}")
+                    else:
+                        st.caption("Progress is not tracked automatically "
+                                   "for this goal and metric.")
 
                 submit_button = st.form_submit_button("Update Goal")
                 if submit_button:
@@ -1,14 +1,20 @@
 import streamlit as st
-from models.health import get_all_health_records, add_health_record, delete_health_record
+import pandas as pd
+from models.health import get_health_records_page, add_health_record, \
+    delete_health_record, search_health_records
+from models.health_import import import_health_csv
 from models.user import get_user_ids
+from pages.components.pagination import paginated_dataframe
+from pages.components.profiler import profiled_page
+from pages.components.record_picker import record_picker
 
+@profiled_page
 def health_page():
     """Health records management page - CRUD operations for health records"""
     st.header("Health Records")
 
-    health_df = get_all_health_records()
     st.write("Current Health Records:")
-    st.dataframe(health_df)
+    paginated_dataframe("health", get_health_records_page)
 
     st.subheader("Add New Health Record")
     user_ids = get_user_ids()
@@ -36,26 +42,44 @@ def health_page():
     else:
         st.info("No users available. Please add a user first.")
 
+    # Bulk import
+    st.subheader("Import Health Records")
+    with st.form("import_health_form"):
+        st.write("CSV columns: userID, date (YYYY-MM-DD), heartrate, VO2max, HRvariation, sleeptime. "
+                 "Existing records for the same user and date are overwritten.")
+        uploaded_file = st.file_uploader("Health CSV", type=["csv"])
+
+        submit_button = st.form_submit_button("Import")
+        if submit_button and uploaded_file is not None:
+            # Kept across the rerun so the summary stays on the refreshed page
+            st.session_state["health_import_report"] = import_health_csv(uploaded_file)
+            st.rerun()
+
+    report = st.session_state.pop("health_import_report", None)
+    if report is not None:
+        if report["success"]:
+            st.success(
+                f"Imported {report['rows_imported']} records in {report['seconds']:.2f}s "
+                f"({report['rows_per_sec']:.0f} rows/sec).")
+            if report["rows_rejected"]:
+                st.warning(f"Rejected {report['rows_rejected']} rows:")
+                st.dataframe(pd.DataFrame(report["rejected"],
+                                          columns=["Line", "Reason"]))
+        else:
+            st.error(f"Error importing health records: {report['error']}")
+
     # Orker ikke update fordi vi bruker foreign keys
 
     # Delete
     st.subheader("Delete Health Record")
-    if not health_df.empty:
-        with st.form("delete_health_form"):
-            # Create a list of user_id + date options for selection
-            health_options = [f"{row['userID']}: {row['date']}" for _, row in health_df.iterrows()]
-            selected_option = st.selectbox("Select Record to Delete", health_options)
+    record = record_picker(
+        "delete_health", "Select Record to Delete", search_health_records,
+        lambda r: f"{r['userID']}: {r['date']}", user_ids)
 
-            submit_button = st.form_submit_button("Delete Record")
-
-            if submit_button:
-                # Parsing
-                user_id, date = selected_option.split(": ")
-                result = delete_health_record(int(user_id), date)
-                if result["success"]:
-                    st.success("Deleted health record successfully!")
-                    st.rerun()
-                else:
-                    st.error(f"Error deleting health record: {result['error']}")
-    else:
-        st.info("No health records available to delete.")
\ No newline at end of file
+    if record is not None and st.button("Delete Record"):
+        result = delete_health_record(int(record["userID"]), record["date"])
+        if result["success"]:
+            st.success("Deleted health record successfully!")
+            st.rerun()
+        else:
+            st.error(f"Error deleting health record: {result['error']}")
@@ -0,0 +1,39 @@
+import streamlit as st
+import pandas as pd
+
+
+def paginated_dataframe(key, fetch_page, page_sizes=(25, 50, 100, 250)):
+    """Show one keyset page from fetch_page(cursor, page_size) with navigation.
+
+    The cursors of the pages visited so far are kept in session state, so
+    Previous/Next only ever fetch a single page. Returns the page's data.
+    """
+    cursors_key = f"{key}_cursors"
+    if cursors_key not in st.session_state:
+        st.session_state[cursors_key] = [None]
+    cursors = st.session_state[cursors_key]
+
+    page_size = st.selectbox("Rows per page", page_sizes, index=1,
+                             key=f"{key}_page_size")
+    result = fetch_page(cursors[-1], page_size)
+
+    if not result["success"]:
+        st.error(f"Error loading records: {result['error']}")
+        return pd.DataFrame()
+
+    st.dataframe(result["data"])
+
+    col1, col2, col3 = st.columns([1, 1, 6])
+    with col1:
+        if st.button("Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if st.button("Next", key=f"{key}_next",
+                     disabled=result["next_cursor"] is None):
+            cursors.append(result["next_cursor"])
+            st.rerun()
+    with col3:
+        st.caption(f"Page {len(cursors)}")
+
+    return result["data"]
@@ -0,0 +1,221 @@
+import contextvars
+import cProfile
+import functools
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+import streamlit as st
+import pandas as pd
+from db.fanout import run_reads
+
+# Profiling is turned on with FITNESS_PROFILE=1 in the environment or
+# ?profile=1 in the page URL; "cprofile" instead of 1 also runs the page
+# under cProfile and saves the stats for that rerun.
+PROFILE_ENV_VAR = "FITNESS_PROFILE"
+PROFILE_QUERY_PARAM = "profile"
+CPROFILE_MODE = "cprofile"
+CPROFILE_TOP_N = 30
+
+# Calls timed as their own phase when a component makes them through its
+# st or px name; the rest of st.* counts as page code
+TIMED_ATTRIBUTES = {
+    "st": {
+        "dataframe": "Tables",
+        "table": "Tables",
+        "data_editor": "Tables",
+        "plotly_chart": "Charts",
+    },
+    "px": "Figures",
+}
+PHASES = ("Model calls", "Figures", "Tables", "Charts")
+
+# The profile of the page run in progress and how many timed calls enclose
+# the current one. Context variables, so run_reads carries them onto its
+# worker threads.
+_profile = contextvars.ContextVar("profile", default=None)
+_depth = contextvars.ContextVar("profile_depth", default=0)
+_instrument_lock = threading.Lock()
+_instrumented = set()
+
+
+class _Profile:
+    """Timings gathered during one profiled page run"""
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def add(self, phase, name, seconds, nested):
+        with self._lock:
+            # Nested calls are already inside an enclosing call's time, e.g.
+            # the reads run_reads fans out
+            if not nested:
+                self.phases[phase] += seconds
+            self.calls.append((phase if not nested else f"{phase} (nested)",
+                               name, seconds))
+
+
+def _timed(phase, func, name=None):
+    """Wrap func so its calls are timed while a page is being profiled.
+
+    Outside a profiled run the wrapper just calls through.
+    """
+    name = name or f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _profile.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        depth = _depth.get()
+        token = _depth.set(depth + 1)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _depth.reset(token)
+            profile.add(phase, name, time.perf_counter() - started, depth > 0)
+
+    wrapper.profiled = True
+    return wrapper
+
+
+class _TimedModule:
+    """Stand-in for a module that times some of its functions.
+
+    Replaces a component's own st or px name, so the modules themselves
+    are left untouched.
+    """
+
+    def __init__(self, module, alias, phases):
+        self._module = module
+        self._alias = alias
+        self._phases = phases
+        self._wrappers = {}
+
+    def __getattr__(self, name):
+        value = getattr(self._module, name)
+        phase = self._phases if isinstance(self._phases, str) else self._phases.get(name)
+        if phase is None or not callable(value):
+            return value
+        wrapper = self._wrappers.get(name)
+        if wrapper is None:
+            wrapper = self._wrappers[name] = _timed(phase, value, f"{self._alias}.{name}")
+        return wrapper
+
+
+def _instrument(namespace):
+    """Time the model calls, figures and rendering of a component module.
+
+    Runs once per module when its page function is defined. Helpers from
+    other component modules (pagination, pickers) are instrumented too.
+    """
+    module = namespace["__name__"]
+    with _instrument_lock:
+        if module in _instrumented:
+            return
+        _instrumented.add(module)
+    helpers = []
+    for name, value in list(namespace.items()):
+        if getattr(value, "profiled", False) or isinstance(value, _TimedModule):
+            continue
+        value_module = getattr(value, "__module__", None) or ""
+        if name in TIMED_ATTRIBUTES and hasattr(value, "__name__"):
+            namespace[name] = _TimedModule(value, name, TIMED_ATTRIBUTES[name])
+        elif callable(value) and (value_module.startswith("models.") or value is run_reads):
+            namespace[name] = _timed("Model calls", value)
+        elif callable(value) and value_module.startswith("pages.components.") \
+                and value_module != __name__ and hasattr(value, "__globals__"):
+            helpers.append(value.__globals__)
+    for helper_namespace in helpers:
+        _instrument(helper_namespace)
+
+
+def _profile_mode():
+    """None, "timing" or "cprofile" from the environment or the URL"""
+    value = st.query_params.get(PROFILE_QUERY_PARAM) or os.environ.get(PROFILE_ENV_VAR)
+    if not value or value.lower() in ("0", "false", "off"):
+        return None
+    return CPROFILE_MODE if value.lower() == CPROFILE_MODE else "timing"
+
+
+def _save_cprofile(profiler, page_name):
+    """Write the cProfile stats to a file and return (path, top functions)"""
+    path = os.path.join(tempfile.gettempdir(),
+                        f"profile-{page_name}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+    profiler.dump_stats(path)
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(CPROFILE_TOP_N)
+    return path, text.getvalue()
+
+
+def _show_profile(profile, total, cprofile_output=None):
+    """Timing breakdown panel at the bottom of the page"""
+    st.divider()
+    st.subheader("Page Profile")
+
+    phases = dict(profile.phases)
+    phases["Page code and pandas"] = max(total - sum(phases.values()), 0.0)
+    cols = st.columns(len(phases) + 1)
+    cols[0].metric("Total", f"{total * 1000:.0f} ms")
+    for col, (phase, seconds) in zip(cols[1:], phases.items()):
+        col.metric(phase, f"{seconds * 1000:.0f} ms")
+
+    calls_df = pd.DataFrame(profile.calls, columns=["phase", "call", "seconds"])
+    if not calls_df.empty:
+        calls_df = calls_df.groupby(["phase", "call"], as_index=False).agg(
+            calls=("seconds", "size"), total_ms=("seconds", "sum"))
+        calls_df["total_ms"] = (calls_df["total_ms"] * 1000).round(1)
+        st.dataframe(calls_df.sort_values("total_ms", ascending=False,
+                                          ignore_index=True))
+
+    if cprofile_output is not None:
+        path, text = cprofile_output
+        st.caption(f"Timings above include cProfile overhead. Stats saved to {path}")
+        with st.expander(f"cProfile: top {CPROFILE_TOP_N} by cumulative time"):
+            st.text(text)
+        with open(path, "rb") as f:
+            st.download_button("Download cProfile stats", f.read(),
+                               file_name=os.path.basename(path))
+
+
+def profiled_page(page):
+    """Show a timing breakdown below a *_page() function when profiling is on.
+
+    Time is split into model calls, Plotly figure building, table and chart
+    rendering, and everything else on the page. Reads fanned out through
+    run_reads are listed individually as nested model calls.
+    """
+    _instrument(page.__globals__)
+
+    @functools.wraps(page)
+    def wrapper():
+        mode = _profile_mode()
+        if mode is None:
+            return page()
+        profile = _Profile()
+        token = _profile.set(profile)
+        profiler = cProfile.Profile() if mode == CPROFILE_MODE else None
+        started = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            try:
+                result = page()
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+        finally:
+            _profile.reset(token)
+        total = time.perf_counter() - started
+
+        page_name = page.__name__.removesuffix("_page")
+        cprofile_output = _save_cprofile(profiler, page_name) if profiler else None
+        _show_profile(profile, total, cprofile_output)
+        return result
+
+    return wrapper
@@ -0,0 +1,47 @@
+import streamlit as st
+
+# Most matches a picker lists; narrower filters reach the rest
+PICKER_LIMIT = 50
+
+
+def record_picker(key, label, search, format_record, user_ids, types=None,
+                  limit=PICKER_LIMIT):
+    """Pick one record through filters and a search query instead of a full list.
+
+    search(user_id, start_date, end_date[, record_type], limit) is a model
+    search function returning {"success", "data", "more"}; types adds a
+    type filter. Only the matching page of records is fetched and labelled,
+    so the cost does not grow with the table. Returns the chosen record as
+    a dict, or None when nothing matches.
+    """
+    cols = st.columns(3 if types else 2)
+    with cols[0]:
+        user_id = st.selectbox("User", [None] + list(user_ids),
+                               format_func=lambda u: "All users" if u is None else str(u),
+                               key=f"{key}_user")
+    with cols[1]:
+        dates = st.date_input("Date range", value=(), key=f"{key}_dates")
+    filters = [user_id, dates[0] if dates else None,
+               dates[-1] if dates else None]
+    if types:
+        with cols[2]:
+            filters.append(st.selectbox(
+                "Type", [None] + list(types),
+                format_func=lambda t: "All types" if t is None else t,
+                key=f"{key}_type"))
+
+    result = search(*filters, limit)
+    if not result["success"]:
+        st.error(f"Error searching records: {result['error']}")
+        return None
+    records = result["data"].to_dict("records")
+    if not records:
+        st.info("No records match these filters.")
+        return None
+    if result["more"]:
+        st.caption(f"Showing the {limit} newest matches; narrow the filters to find others.")
+
+    labels = [format_record(record) for record in records]
+    index = st.selectbox(label, range(len(records)),
+                         format_func=labels.__getitem__, key=f"{key}_record")
+    return records[index]
@@ -2,8 +2,10 @@ import streamlit as st
 from datetime import datetime
 from models.user import get_all_users, add_user, update_user, delete_user, \
     get_user_by_id, get_user_ids
+from pages.components.profiler import profiled_page
 
 
+@profiled_page
 def users_page():
     """User management page - CRUD operations for users"""
     st.header("Users")
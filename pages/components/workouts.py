@@ -3,34 +3,74 @@ from datetime import datetime, timedelta
 import pandas as pd
 from models.user import get_user_ids
 from models.workout import (
-    get_all_workouts,
-    add_workout,
+    WORKOUT_TYPES,
+    get_workouts_page,
+    search_workouts,
     delete_workout,
-    add_run_interval,
-    add_weightlift_set,
+    create_run_workout,
+    create_weightlift_workout,
     get_exercises
 )
+from models.runs import get_run_analytics
+from pages.components.pagination import paginated_dataframe
+from pages.components.profiler import profiled_page
+from pages.components.record_picker import record_picker
 
 
+def _formatted_workouts_page(cursor, page_size):
+    """Fetch a page of workouts with the datetime columns formatted for display"""
+    result = get_workouts_page(cursor, page_size)
+    workouts_df = result.get("data")
+
+    # Times are stored as epoch seconds; format them for display
+    if result["success"] and not workouts_df.empty:
+        for column in ('startTime', 'endTime'):
+            workouts_df[column] = pd.to_datetime(
+                workouts_df[column], unit='s').dt.strftime('%Y-%m-%d %H:%M')
+    return result
+
+
+def _format_pace(seconds):
+    """Format a series of paces in seconds per km as mm:ss"""
+    seconds = seconds.round()
+    formatted = ((seconds // 60).astype("Int64").astype(str) + ":"
+                 + (seconds % 60).astype("Int64").astype(str).str.zfill(2))
+    return formatted.where(seconds.notna(), "")
+
+
+def _run_analysis(user_ids):
+    """Distance and pace breakdown of one user's runs"""
+    st.subheader("Run Analysis")
+    user_id = st.selectbox("User", user_ids, key="run_analysis_user")
+    result = get_run_analytics(user_id)
+
+    if not result["success"]:
+        st.error(f"Error analysing runs: {result['error']}")
+        return
+    workouts_df = result["workouts"]
+    if workouts_df.empty:
+        st.info("This user has no running intervals yet.")
+        return
+
+    workouts_df["startTime"] = pd.to_datetime(
+        workouts_df["startTime"], unit='s').dt.strftime('%Y-%m-%d %H:%M')
+    for df in (workouts_df, result["by_incline"]):
+        df["pace"] = _format_pace(df["pace"])
+
+    st.write("Per workout (pace in min/km, weighted by distance):")
+    st.dataframe(workouts_df)
+    st.write("By incline (%):")
+    st.dataframe(result["by_incline"])
+
+
+@profiled_page
 def workouts_page():
     """Workout management page - CRUD operations for workouts"""
     st.header("Workouts")
 
-    # Read operation - display all workouts
-    workouts_df = get_all_workouts()
-
-    # Format datetime columns for better display
-    if not workouts_df.empty and 'startTime' in workouts_df.columns and 'endTime' in workouts_df.columns:
-        try:
-            workouts_df['startTime'] = pd.to_datetime(
-                workouts_df['startTime']).dt.strftime('%Y-%m-%d %H:%M')
-            workouts_df['endTime'] = pd.to_datetime(
-                workouts_df['endTime']).dt.strftime('%Y-%m-%d %H:%M')
-        except Exception:
-            pass
-
+    # Read operation - display one page of workouts
     st.write("Current Workouts:")
-    st.dataframe(workouts_df)
+    paginated_dataframe("workouts", _formatted_workouts_page)
 
     st.subheader("Add New Workout")
 
@@ -94,7 +134,7 @@ def workouts_page():
                                               max_value=59,
                                               value=0,
                                               key=f"sec_{i}")
-                    pace = f"{minutes:02d}:{seconds:02d}"
+                    pace = minutes * 60 + seconds
 
                 with col3:
                     incline = st.number_input(f"Incline (%)",
@@ -114,35 +154,20 @@ def workouts_page():
             submit_button = st.form_submit_button("Add Running Workout")
 
             if submit_button:
-                result = add_workout(
-                    user_id,
-                    start_datetime.strftime("%Y-%m-%d %H:%M:%S"),
-                    end_datetime.strftime("%Y-%m-%d %H:%M:%S"),
-                    max_hr,
-                    "Run"
+                # The workout and its intervals are saved in one transaction
+                result = create_run_workout(
+                    {
+                        "user_id": user_id,
+                        "start_time": start_datetime.strftime("%Y-%m-%d %H:%M:%S"),
+                        "end_time": end_datetime.strftime("%Y-%m-%d %H:%M:%S"),
+                        "max_hr": max_hr
+                    },
+                    intervals
                 )
 
                 if result["success"]:
-                    workout_id = result["workout_id"]
-
-                    # Then add all intervals
-                    all_intervals_success = True
-                    for interval in intervals:
-                        interval_result = add_run_interval(
-                            workout_id,
-                            interval["interval_nr"],
-                            interval["distance"],
-                            interval["pace"],
-                            interval["incline"]
-                        )
-                        if not interval_result["success"]:
-                            st.error(
-                                f"Error adding interval {interval['interval_nr']}: {interval_result['error']}")
-                            all_intervals_success = False
-
-                    if all_intervals_success:
-                        st.success("Running workout added successfully!")
-                        st.rerun()
+                    st.success("Running workout added successfully!")
+                    st.rerun()
                 else:
                     st.error(f"Error adding workout: {result['error']}")
 
@@ -181,6 +206,7 @@ def workouts_page():
             else:
                 exercises = exercises_result["exercises"]
 
+            exercise_sets = []
             if not exercises:
                 st.warning(
                     "No exercises found in the database. ")
@@ -191,13 +217,16 @@ def workouts_page():
                                                 min_value=1, max_value=10,
                                                 value=3)
 
-                exercise_sets = []
+                # Sets of an exercise picked more than once continue its
+                # set numbers instead of repeating them
+                set_counts = {}
                 for i in range(num_exercises):
                     st.write(f"Exercise {i + 1}")
 
                     exercise_id = st.selectbox(
                         f"Exercise",
                         options=[ex["id"] for ex in exercises],
+                        index=i % len(exercises),
                         format_func=lambda x: next(
                             (ex["name"] + " (" + ex["muscleGroup"] + ")" for ex
                              in exercises if ex["id"] == x), ""),
@@ -226,9 +255,10 @@ def workouts_page():
                                                      step=2.5,
                                                      key=f"weight_{i}_{j}")
 
+                        set_counts[exercise_id] = set_counts.get(exercise_id, 0) + 1
                         exercise_sets.append({
                             "exercise_id": exercise_id,
-                            "set_nr": j + 1,
+                            "set_nr": set_counts[exercise_id],
                             "reps": reps,
                             "weight": weight
                         })
@@ -237,59 +267,38 @@ def workouts_page():
                 "Add Weightlifting Workout")
 
             if submit_button:
-                # First add the workout
-                result = add_workout(
-                    user_id,
-                    start_datetime.strftime("%Y-%m-%d %H:%M:%S"),
-                    end_datetime.strftime("%Y-%m-%d %H:%M:%S"),
-                    max_hr,
-                    "Weightlift"
+                # The workout and its sets are saved in one transaction
+                result = create_weightlift_workout(
+                    {
+                        "user_id": user_id,
+                        "start_time": start_datetime.strftime("%Y-%m-%d %H:%M:%S"),
+                        "end_time": end_datetime.strftime("%Y-%m-%d %H:%M:%S"),
+                        "max_hr": max_hr
+                    },
+                    exercise_sets
                 )
 
                 if result["success"]:
-                    workout_id = result["workout_id"]
-
-                    # Then add all sets
-                    all_sets_success = True
-                    for ex_set in exercise_sets:
-                        set_result = add_weightlift_set(
-                            workout_id,
-                            ex_set["exercise_id"],
-                            ex_set["set_nr"],
-                            ex_set["reps"],
-                            ex_set["weight"]
-                        )
-                        if not set_result["success"]:
-                            st.error(
-                                f"Error adding set: {set_result['error']}")
-                            all_sets_success = False
-
-                    if all_sets_success:
-                        st.success(
-                            "Weightlifting workout added successfully!")
-                        st.rerun()
+                    st.success(
+                        "Weightlifting workout added successfully!")
+                    st.rerun()
                 else:
                     st.error(f"Error adding workout: {result['error']}")
 
     # Delete operation
     st.subheader("Delete Workout")
-    if not workouts_df.empty:
-        with st.form("delete_workout_form"):
-            workout_id = st.selectbox(
-                "Select Workout to Delete",
-                options=workouts_df['workoutID'].tolist(),
-                format_func=lambda
-                    x: f"Workout {x} - {workouts_df[workouts_df['workoutID'] == x]['workoutType'].iloc[0]} - {workouts_df[workouts_df['workoutID'] == x]['startTime'].iloc[0]}"
-            )
-
-            submit_button = st.form_submit_button("Delete Workout")
-
-            if submit_button:
-                result = delete_workout(workout_id)
-                if result["success"]:
-                    st.success("Workout deleted successfully!")
-                    st.rerun()
-                else:
-                    st.error(f"Error deleting workout: {result['error']}")
-    else:
-        st.info("No workouts available to delete.")
\ No newline at end of file
+    workout = record_picker(
+        "delete_workout", "Select Workout to Delete", search_workouts,
+        lambda w: f"Workout {w['workoutID']} - {w['workoutType']} - "
+                  f"{pd.to_datetime(w['startTime'], unit='s'):%Y-%m-%d %H:%M}",
+        user_ids, WORKOUT_TYPES)
+
+    if workout is not None and st.button("Delete Workout"):
+        result = delete_workout(workout["workoutID"])
+        if result["success"]:
+            st.success("Workout deleted successfully!")
+            st.rerun()
+        else:
+            st.error(f"Error deleting workout: {result['error']}")
+
+    _run_analysis(user_ids)
@@ -0,0 +1,42 @@
+import pytest
+from config import db_config
+from db import init_db, get_db_connection, close_all_pools
+from db.cache import clear_cache
+from db.coherence import close_watchers
+from models.goals import add_goal, evaluate_goals
+from models.user import add_user
+from models.workout import add_workout
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """A migrated scratch database in place of fitness_tracker.db"""
+    monkeypatch.setattr(db_config, "DATABASE_FILE", str(tmp_path / "fitness_tracker.db"))
+    clear_cache()
+    init_db()
+    yield
+    close_all_pools()
+    close_watchers()
+    clear_cache()
+
+
+def _progress_rows():
+    conn = get_db_connection()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM GoalProgress").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_evaluate_goals_counts_progress_rows(database):
+    add_user("Ada", "Lovelace", 60.0, "1990-01-01", "F")
+    add_workout(1, "2024-01-01 10:00:00", "2024-01-01 11:00:00", 150, "Run")
+    add_goal(1, "Exercise Time", 120, "min")
+    add_goal(1, "Run Distance", 10, "km")
+    # Not measurable, so it gets no progress row
+    add_goal(1, "Stretch", 5, "days")
+
+    assert evaluate_goals() == {"success": True, "evaluated": 2}
+    assert _progress_rows() == 2
+    assert evaluate_goals() == {"success": True, "evaluated": 0}
+    assert evaluate_goals(full=True) == {"success": True, "evaluated": 2}